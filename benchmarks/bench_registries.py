@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of Flask-Registry
+# Copyright (C) 2016 CERN.
+#
+# Flask-Registry is free software; you can redistribute it and/or
+# modify it under the terms of the Revised BSD License; see LICENSE
+# file for more details.
+
+"""
+Benchmarks of the core registries.
+
+Run them with::
+
+    $ python benchmarks/bench_registries.py [--items 100000] [--repeat 5]
+
+Each benchmark prints the best time of several runs.
+"""
+
+from __future__ import absolute_import, print_function
+
+import argparse
+import sys
+import threading
+import timeit
+
+from flask_registry import (ConcurrentDictRegistry, ConcurrentListRegistry,
+                            DictRegistry, ImportPathRegistry, ListRegistry,
+                            ModuleRegistry, Registry)
+
+
+class Module(object):
+    """Module-like object with a setup function."""
+
+    def setup(self):
+        pass
+
+
+def bench_register(items):
+    """Register items one by one and in bulk."""
+    values = ['item%d' % i for i in range(items)]
+    pairs = [('key%d' % i, value) for i, value in enumerate(values)]
+    import_paths = ['package.module%d' % i for i in range(items)]
+    modules = [Module() for _ in range(items)]
+
+    def register(registry_class, items, *args):
+        def run():
+            registry = registry_class(*args)
+            for item in items:
+                registry.register(item)
+        return run
+
+    def register_dict(items):
+        def run():
+            registry = DictRegistry()
+            for key, value in items:
+                registry.register(key, value)
+        return run
+
+    def register_many(registry_class, items, *args):
+        return lambda: registry_class(*args).register_many(items)
+
+    return [
+        ('ListRegistry.register', register(ListRegistry, values)),
+        ('ListRegistry.register_many', register_many(ListRegistry, values)),
+        ('DictRegistry.register', register_dict(pairs)),
+        ('DictRegistry.register_many', register_many(DictRegistry, pairs)),
+        ('ImportPathRegistry.register',
+         register(ImportPathRegistry, import_paths)),
+        ('ImportPathRegistry.register_many',
+         register_many(ImportPathRegistry, import_paths)),
+        ('ModuleRegistry.register', register(ModuleRegistry, modules)),
+        ('ModuleRegistry.register_many',
+         register_many(ModuleRegistry, modules)),
+    ]
+
+
+def bench_concurrent_reads(items, readers=8, writes=100, size=1000):
+    """
+    Read registries from several threads while another thread changes them.
+
+    The core registries are protected by a global lock, the concurrent
+    registries are read without lock.
+    """
+    keys = ['key%d' % i for i in range(size)]
+    lookups = items // readers
+
+    def run(registry, read, write, lock=None):
+        def reader():
+            if lock is None:
+                for i in range(lookups):
+                    read(registry, i % size)
+            else:
+                for i in range(lookups):
+                    with lock:
+                        read(registry, i % size)
+
+        def writer():
+            for i in range(writes):
+                if lock is None:
+                    write(registry, i)
+                else:
+                    with lock:
+                        write(registry, i)
+
+        def bench():
+            threads = [threading.Thread(target=reader)
+                       for _ in range(readers)]
+            threads.append(threading.Thread(target=writer))
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        return bench
+
+    def dict_registry(registry_class):
+        registry = registry_class()
+        registry.register_many((key, key) for key in keys)
+        return registry
+
+    def read_dict(registry, i):
+        return registry[keys[i]]
+
+    def write_dict(registry, i):
+        registry.register('new%d' % i, i)
+        registry.unregister('new%d' % i)
+
+    def list_registry(registry_class):
+        registry = registry_class()
+        registry.register_many(keys)
+        return registry
+
+    def read_list(registry, i):
+        return registry[i]
+
+    def write_list(registry, i):
+        registry.register(i)
+        registry.unregister(i)
+
+    return [
+        ('DictRegistry, global lock',
+         run(dict_registry(DictRegistry), read_dict, write_dict,
+             threading.Lock())),
+        ('ConcurrentDictRegistry',
+         run(dict_registry(ConcurrentDictRegistry), read_dict, write_dict)),
+        ('ListRegistry, global lock',
+         run(list_registry(ListRegistry), read_list, write_list,
+             threading.Lock())),
+        ('ConcurrentListRegistry',
+         run(list_registry(ConcurrentListRegistry), read_list, write_list)),
+    ]
+
+
+def bench_namespaces(items, packages=100, namespaces=10):
+    """
+    List the namespaces of packages with the namespace tree and by scanning
+    all namespaces.
+    """
+    registry = Registry()
+    for package in range(packages):
+        for namespace in range(namespaces):
+            registry['package%d.namespace%d' % (package, namespace)] = \
+                ListRegistry()
+    prefixes = ['package%d' % (i % packages) for i in range(items // 100)]
+
+    def tree():
+        for prefix in prefixes:
+            registry.list_namespaces(prefix)
+
+    def scan():
+        for prefix in prefixes:
+            dotted = prefix + '.'
+            sorted(key for key in registry
+                   if key == prefix or key.startswith(dotted))
+
+    return [
+        ('Registry.list_namespaces', tree),
+        ('Registry namespace scan', scan),
+    ]
+
+
+BENCHMARKS = [bench_register, bench_concurrent_reads, bench_namespaces]
+"""Functions returning a list of ``(name, function)`` pairs to time."""
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--items', type=int, default=100000,
+                        help='number of items per registry')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='number of runs of each benchmark')
+    args = parser.parse_args()
+
+    is_gil_enabled = getattr(sys, '_is_gil_enabled', None)
+    print('Python %s, GIL %s' % (
+        sys.version.split()[0],
+        'enabled' if is_gil_enabled is None or is_gil_enabled()
+        else 'disabled'))
+    for benchmark in BENCHMARKS:
+        for name, func in benchmark(args.items):
+            best = min(timeit.repeat(func, number=1, repeat=args.repeat))
+            print('%-45s %10.2f ms' % (name, best * 1000))
+
+
+if __name__ == '__main__':
+    main()
@@ -36,26 +36,77 @@ A simple usage example of ``ListRegistry`` looks like this:
     something else
 """
 
-from .base import Registry, RegistryError, RegistryProxy, RegistryBase
-from .registries.core import (ListRegistry, DictRegistry,
-                              ImportPathRegistry, ModuleRegistry,
-                              SingletonRegistry)
-from .registries.modulediscovery import (ModuleDiscoveryRegistry,
-                                         ModuleAutoDiscoveryRegistry)
-from .registries.pkgresources import (EntryPointRegistry,
-                                      PkgResourcesDirDiscoveryRegistry)
-from .registries.appdiscovery import (PackageRegistry,
-                                      ExtensionRegistry,
-                                      ConfigurationRegistry,
-                                      BlueprintAutoDiscoveryRegistry)
+import sys
+from importlib import import_module
+from types import ModuleType
 
 from .version import __version__
 
+_LAZY_ATTRIBUTES = {
+    '.base': ('Registry', 'RegistryError', 'RegistryProxy', 'RegistryBase',
+              'derived_view'),
+    '.registries.core': ('ListRegistry', 'DictRegistry', 'ImportPathRegistry',
+                         'ModuleRegistry', 'SingletonRegistry',
+                         'PriorityListRegistry', 'WeakListRegistry',
+                         'WeakDictRegistry', 'CacheRegistry',
+                         'ConcurrentListRegistry', 'ConcurrentDictRegistry',
+                         'IndexedImportPathRegistry'),
+    '.registries.modulediscovery': ('ModuleDiscoveryRegistry',
+                                    'ModuleAutoDiscoveryRegistry'),
+    '.registries.pkgresources': ('EntryPointRegistry',
+                                 'PkgResourcesDirDiscoveryRegistry',
+                                 'ResourceIndexRegistry',
+                                 'StaticResourceRegistry'),
+    '.registries.appdiscovery': ('PackageRegistry', 'ExtensionRegistry',
+                                 'ConfigurationRegistry',
+                                 'BlueprintAutoDiscoveryRegistry'),
+}
+"""Modules defining the exported names. Importing ``flask_registry`` does
+not import them (e.g. ``pkg_resources`` is only imported together with
+``flask_registry.registries.pkgresources``)."""
+
+_ATTRIBUTE_MODULES = dict(
+    (name, module) for module, names in _LAZY_ATTRIBUTES.items()
+    for name in names
+)
+
 __all__ = (
     'Registry', 'RegistryError', 'RegistryProxy', 'RegistryBase',
+    'derived_view',
     'ListRegistry', 'DictRegistry', 'ImportPathRegistry', 'ModuleRegistry',
     'ModuleDiscoveryRegistry', 'ModuleAutoDiscoveryRegistry',
     'EntryPointRegistry', 'PkgResourcesDirDiscoveryRegistry',
+    'ResourceIndexRegistry', 'StaticResourceRegistry',
     'PackageRegistry', 'ExtensionRegistry', 'ConfigurationRegistry',
-    'BlueprintAutoDiscoveryRegistry', 'SingletonRegistry', '__version__'
+    'BlueprintAutoDiscoveryRegistry', 'SingletonRegistry',
+    'PriorityListRegistry', 'WeakListRegistry', 'WeakDictRegistry',
+    'CacheRegistry', 'ConcurrentListRegistry', 'ConcurrentDictRegistry',
+    'IndexedImportPathRegistry', '__version__'
 )
+
+
+class _LazyModule(ModuleType):
+    """Module importing the submodule of an exported name on access."""
+
+    def __getattr__(self, name):
+        if name not in _ATTRIBUTE_MODULES:
+            raise AttributeError("module %r has no attribute %r" % (
+                self.__name__, name))
+        value = getattr(import_module(_ATTRIBUTE_MODULES[name], __name__),
+                        name)
+        setattr(self, name, value)
+        return value
+
+    def __dir__(self):
+        return sorted(set(self.__dict__) | set(__all__))
+
+
+try:
+    sys.modules[__name__].__class__ = _LazyModule
+except TypeError:  # Python < 3.5 does not allow changing the module class.
+    # The registries import the names of ``.base`` from this package, so
+    # ``.base`` is imported first.
+    for _module in sorted(_LAZY_ATTRIBUTES):
+        for _name in _LAZY_ATTRIBUTES[_module]:
+            globals()[_name] = getattr(import_module(_module, __name__),
+                                       _name)
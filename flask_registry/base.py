@@ -11,9 +11,21 @@
 
 from __future__ import absolute_import, unicode_literals
 
-from flask import current_app
+import threading
+from functools import wraps
+from itertools import count
+
+from flask import current_app, has_app_context
 from werkzeug.local import LocalProxy
 
+from .metrics import RegistryMetrics
+from .utils import _DottedTrie
+
+try:
+    from concurrent.futures import Future
+except ImportError:  # Python 2 without the futures backport
+    Future = None
+
 try:
     from collections import MutableMapping
 except ImportError:
@@ -29,6 +41,11 @@ class RegistryError(Exception):
     """
 
 
+def _is_dotted(key):
+    """Check if a namespace can be indexed as a dotted name."""
+    return hasattr(key, 'split') and key != ''
+
+
 class Registry(MutableMapping):
 
     """
@@ -51,6 +68,22 @@ class Registry(MutableMapping):
     >>> r
     <Registry ()>
 
+    Dotted namespaces are indexed in a tree, so the namespaces below a
+    namespace are found without scanning all namespaces:
+
+    >>> from flask_registry import ListRegistry
+    >>> r['records.views'] = ListRegistry()
+    >>> r['records.schemas'] = ListRegistry()
+    >>> r['search'] = ListRegistry()
+    >>> r.list_namespaces('records')
+    ['records.schemas', 'records.views']
+    >>> r.has_namespaces('records')
+    True
+    >>> r.remove_namespaces('records')
+    ['records.schemas', 'records.views']
+    >>> r
+    <Registry (search)>
+
     """
 
     def __init__(self, app=None):
@@ -62,6 +95,9 @@ class Registry(MutableMapping):
         """
         super(MutableMapping, self).__init__()
         self._registry = {}
+        self._namespaces = _DottedTrie()
+        self._swap_lock = threading.Lock()
+        self.metrics = None
         self.app = app
         if app is not None:
             self.init_app(app)
@@ -84,6 +120,25 @@ class Registry(MutableMapping):
             raise RegistryError("Flask application already initialized")
         app.extensions['registry'] = self
 
+    def enable_metrics(self, metrics=None):
+        """
+        Start counting the usage of the registries.
+
+        See ``flask_registry.metrics`` for the collected metrics.
+
+        :param metrics: Instance of ``RegistryMetrics`` to collect the
+            metrics in. Defaults to a new instance.
+        """
+        self.metrics = metrics or self.metrics or RegistryMetrics()
+        for value in self._registry.values():
+            value._metrics = self.metrics
+
+    def disable_metrics(self):
+        """Stop counting the usage of the registries."""
+        self.metrics = None
+        for value in self._registry.values():
+            value._metrics = None
+
     def __iter__(self):
         """Get iterator over registries."""
         return iter(self._registry)
@@ -92,12 +147,23 @@ class Registry(MutableMapping):
         """Get length of registries."""
         return len(self._registry)
 
+    def __contains__(self, key):
+        """
+        Check if a namespace exists. It is not counted as an access.
+
+        :param key: Namespace
+        """
+        return key in self._registry
+
     def __getitem__(self, key):
         """
         Get a registry with a given namespace.
 
         :param key: Namespace
         """
+        if self.metrics is not None:
+            self.metrics.count(key, 'accesses' if key in self._registry
+                               else 'namespace_misses')
         return self._registry[key]
 
     def __delitem__(self, key):
@@ -106,8 +172,12 @@ class Registry(MutableMapping):
 
         :param key: Namespace
         """
-        self._registry[key].namespace = None
-        del self._registry[key]
+        with self._swap_lock:
+            value = self._registry.pop(key)
+            if _is_dotted(key):
+                self._namespaces.remove(key, key)
+        value.namespace = None
+        value._metrics = None
 
     def __setitem__(self, key, value):
         """
@@ -117,10 +187,135 @@ class Registry(MutableMapping):
         :param value: Instance of RegistryBase or subclass
         :raise flask_registry.RegistryError: if the key is already present
         """
-        if key in self._registry:
-            raise RegistryError("Namespace %s already taken." % key)
+        with self._swap_lock:
+            if key in self._registry:
+                raise RegistryError("Namespace %s already taken." % key)
+            value.namespace = key
+            value._metrics = self.metrics
+            self._registry[key] = value
+            if _is_dotted(key):
+                self._namespaces.add(key, key)
+
+    def list_namespaces(self, prefix):
+        """
+        Get the namespaces which are equal to or below a namespace, e.g.
+        ``records`` and ``records.views`` for ``records``. It takes time
+        proportional to the number of namespaces found.
+
+        :param prefix: Dotted namespace.
+        :returns: Sorted list of namespaces.
+        """
+        return [key for key, _ in self._namespaces.iter_subtree(prefix)]
+
+    def has_namespaces(self, prefix):
+        """
+        Check if a namespace or any namespace below it exists.
+
+        :param prefix: Dotted namespace.
+        """
+        return self._namespaces.has_subtree(prefix)
+
+    def remove_namespaces(self, prefix):
+        """
+        Remove a namespace and all namespaces below it.
+
+        :param prefix: Dotted namespace.
+        :returns: Sorted list of removed namespaces.
+        """
+        keys = self.list_namespaces(prefix)
+        for key in keys:
+            del self[key]
+        return keys
+
+    def swap(self, key, value):
+        """
+        Replace the registry of a namespace in a single step.
+
+        Threads accessing the namespace get either the old or the new
+        registry, never a partially populated one:
+
+        .. doctest::
+
+            >>> from flask import Flask
+            >>> from flask_registry import Registry, ListRegistry
+            >>> r = Registry(app=Flask('myapp'))
+            >>> r['myns'] = ListRegistry()
+            >>> new = ListRegistry()
+            >>> new.register('plugin')
+            >>> old = r.swap('myns', new)
+            >>> list(r['myns'])
+            ['plugin']
+            >>> old.namespace is None
+            True
+
+        :param key: Namespace.
+        :param value: New instance of RegistryBase or subclass.
+        :returns: The replaced registry, or ``None`` if the namespace was not
+            taken.
+        """
         value.namespace = key
-        self._registry[key] = value
+        value._metrics = self.metrics
+        with self._swap_lock:
+            old = self._registry.get(key)
+            self._registry[key] = value
+            if old is None and _is_dotted(key):
+                self._namespaces.add(key, key)
+        if old is not None:
+            old.namespace = None
+            old._metrics = None
+        return old
+
+    def rebuild(self, key, factory, background=False):
+        """
+        Build a new registry for a namespace and swap it in once complete.
+
+        The old registry keeps serving the namespace while the new one is
+        built (e.g. while entry points are loaded again after installing a
+        plugin). If building fails, the old registry stays in place.
+
+        The factory is called in the application context of the application
+        of the Registry (or of the current application).
+
+        :param key: Namespace.
+        :param factory: Function without arguments returning the new
+            registry.
+        :param background: Build the registry in a new thread. Defaults to
+            ``False``. It requires ``concurrent.futures`` (the ``futures``
+            backport on Python 2).
+        :returns: The replaced registry, or a ``concurrent.futures.Future``
+            of it if ``background`` is ``True``. The future holds the
+            exception if building fails.
+        """
+        app = self.app
+        if app is None and has_app_context():
+            app = current_app._get_current_object()
+
+        def build():
+            if app is None:
+                return self.swap(key, factory())
+            with app.app_context():
+                return self.swap(key, factory())
+
+        if not background:
+            return build()
+        if Future is None:
+            raise RegistryError("Building in the background requires "
+                                "concurrent.futures.")
+        future = Future()
+
+        def run():
+            if not future.set_running_or_notify_cancel():
+                return
+            try:
+                future.set_result(build())
+            except BaseException as e:
+                future.set_exception(e)
+
+        thread = threading.Thread(target=run,
+                                  name='flask-registry-rebuild-%s' % key)
+        thread.daemon = True
+        thread.start()
+        return future
 
     def __repr__(self):
         """Get the string representation."""
@@ -144,6 +339,31 @@ class RegistryBase(object):
     """
     _namespace = None
 
+    _metrics = None
+    """Usage metrics injected by the Flask extension when enabled."""
+
+    _version = 0
+
+    _derived_views = None
+    """Cache of the views computed by ``derived_view`` functions."""
+
+    @property
+    def version(self):
+        """
+        Version of the registry content. It increases each time an object is
+        registered or unregistered, and is ``0`` for a registry which has
+        never been changed.
+        """
+        return self._version
+
+    def bump_version(self):
+        """
+        Increase the version of the registry. Subclasses must call it after
+        each change of the registered objects, unless the change is done by
+        calling ``register()`` or ``unregister()`` of a core registry.
+        """
+        self._version = next(_versions)
+
     @property
     def namespace(self):
         """
@@ -177,6 +397,60 @@ class RegistryBase(object):
         raise NotImplementedError()
 
 
+_versions = count(1)
+"""Source of registry versions. ``next()`` is atomic, so versions are unique
+even if registries are changed from several threads."""
+
+
+def derived_view(func):
+    """
+    Decorator memoizing a view derived from the content of a registry.
+
+    The decorated function takes the registry as first argument. Its result
+    is cached in the registry and only computed again once the version of
+    the registry changed:
+
+    .. doctest::
+
+        >>> from flask_registry import ListRegistry, derived_view
+        >>> @derived_view
+        ... def sorted_items(registry):
+        ...     print('sorting')
+        ...     return sorted(registry)
+        >>> registry = ListRegistry()
+        >>> registry.register('b')
+        >>> registry.register('a')
+        >>> sorted_items(registry)
+        sorting
+        ['a', 'b']
+        >>> sorted_items(registry)
+        ['a', 'b']
+        >>> registry.register('c')
+        >>> sorted_items(registry)
+        sorting
+        ['a', 'b', 'c']
+
+    It can also decorate methods of ``RegistryBase`` subclasses. Further
+    arguments must be hashable and are part of the cache key.
+    """
+    @wraps(func)
+    def wrapper(registry, *args, **kwargs):
+        key = (wrapper, args, tuple(sorted(kwargs.items())))
+        # Read the version first, so a change during the computation makes
+        # the cached value stale.
+        version = registry.version
+        views = registry._derived_views
+        if views is None:
+            views = registry._derived_views = {}
+        cached = views.get(key)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        value = func(registry, *args, **kwargs)
+        views[key] = (version, value)
+        return value
+    return wrapper
+
+
 class RegistryProxy(LocalProxy):
     """
     Lazy proxy object to a registry in the ``current_app``
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of Flask-Registry
+# Copyright (C) 2016 CERN.
+#
+# Flask-Registry is free software; you can redistribute it and/or
+# modify it under the terms of the Revised BSD License; see LICENSE
+# file for more details.
+
+"""
+Registry usage metrics.
+
+Metrics are disabled by default. Once enabled, the ``Registry`` counts how
+often each namespace is accessed (and accesses of namespaces which do not
+exist), and the core registries count the item lookups, iterations and
+misses (lookups of items which are not registered):
+
+.. doctest::
+
+    >>> from flask import Flask
+    >>> from flask_registry import Registry, ListRegistry
+    >>> app = Flask('myapp')
+    >>> r = Registry(app=app)
+    >>> r['myns'] = ListRegistry()
+    >>> r.enable_metrics()
+    >>> r['myns'].register('something')
+    >>> 'something' in r['myns'], 'other' in r['myns']
+    (True, False)
+    >>> for metric, value in sorted(r.metrics.snapshot()['myns'].items()):
+    ...     print('%s: %s' % (metric, value))
+    accesses: 3
+    iterations: 0
+    lookups: 2
+    misses: 1
+    namespace_misses: 0
+
+The metrics can be exported in the Prometheus text format by adding the
+``metrics_view`` to your application:
+
+.. code-block:: python
+
+    from flask_registry.metrics import metrics_view
+
+    app.add_url_rule('/metrics/registry', view_func=metrics_view)
+"""
+
+from __future__ import absolute_import
+
+from flask import Response, current_app
+
+METRICS = (
+    ('accesses', 'Number of times a registry namespace was accessed.'),
+    ('lookups', 'Number of item lookups in a registry namespace.'),
+    ('iterations', 'Number of iterations over a registry namespace.'),
+    ('misses', 'Number of lookups of items not in a registry namespace.'),
+    ('namespace_misses', 'Number of accesses of a missing registry '
+                         'namespace.'),
+)
+"""Names and descriptions of the collected metrics."""
+
+
+class RegistryMetrics(object):
+    """
+    Counters of registry usage per namespace.
+
+    Counters are not protected by a lock, so under concurrent access a few
+    increments may be lost. This is acceptable for finding hot registries
+    and keeps the overhead of counting low.
+    """
+
+    def __init__(self):
+        self._counters = {}
+
+    def count(self, namespace, metric):
+        """
+        Increment a counter of a namespace.
+
+        :param namespace: Registry namespace.
+        :param metric: Name of the metric (see ``METRICS``).
+        """
+        try:
+            self._counters[namespace][metric] += 1
+        except KeyError:
+            counters = self._counters.setdefault(
+                namespace, dict((name, 0) for name, _ in METRICS))
+            counters[metric] += 1
+
+    def reset(self):
+        """Reset all counters."""
+        self._counters.clear()
+
+    def snapshot(self):
+        """
+        Get a copy of all counters.
+
+        :returns: Dictionary mapping namespaces to dictionaries of metrics.
+        """
+        return dict((namespace, dict(counters))
+                    for namespace, counters in self._counters.items())
+
+    def to_prometheus(self, prefix='flask_registry'):
+        """
+        Export the counters in the Prometheus text exposition format.
+
+        :param prefix: Prefix of the metric names.
+        """
+        snapshot = self.snapshot()
+        lines = []
+        for metric, description in METRICS:
+            name = '%s_%s_total' % (prefix, metric)
+            lines.append('# HELP %s %s' % (name, description))
+            lines.append('# TYPE %s counter' % name)
+            for namespace in sorted(snapshot, key=str):
+                lines.append('%s{namespace="%s"} %d' % (
+                    name, _escape_label(namespace),
+                    snapshot[namespace][metric]))
+        return '\n'.join(lines) + '\n'
+
+
+def _escape_label(value):
+    """Escape a Prometheus label value."""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace(
+        '\n', '\\n')
+
+
+def metrics_view():
+    """
+    Flask view exporting the metrics of the application registry.
+
+    Responds with ``404`` if metrics are not enabled.
+    """
+    metrics = getattr(current_app.extensions.get('registry'), 'metrics', None)
+    if metrics is None:
+        return Response('Registry metrics are not enabled.\n', status=404,
+                        mimetype='text/plain')
+    return Response(metrics.to_prometheus(),
+                    mimetype='text/plain; version=0.0.4')
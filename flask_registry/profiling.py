@@ -0,0 +1,436 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of Flask-Registry
+# Copyright (C) 2016 CERN.
+#
+# Flask-Registry is free software; you can redistribute it and/or
+# modify it under the terms of the Revised BSD License; see LICENSE
+# file for more details.
+
+"""
+Profiling of the application assembly.
+
+The discovery registries report each package they process (a discovered
+package, an extension or an entry point) as a step to the active profilers.
+A profiler attributes the cost of a step to the package.
+
+Import tracing
+^^^^^^^^^^^^^^
+The ``ImportTracer`` records the time spent executing every newly imported
+module and attributes it to the package whose discovery triggered the
+import. This shows which packages are expensive because of their transitive
+imports:
+
+.. code-block:: python
+
+    from flask_registry.profiling import ImportTracer
+
+    with ImportTracer() as tracer:
+        app = create_app()
+    print(tracer.format_report(limit=10))
+
+Memory profiling
+^^^^^^^^^^^^^^^^
+The ``MemoryProfiler`` takes ``tracemalloc`` snapshots around each step and
+records the memory allocated (and not freed) by each package, extension
+and entry point:
+
+.. code-block:: python
+
+    from flask_registry.profiling import MemoryProfiler
+
+    with MemoryProfiler() as profiler:
+        app = create_app()
+    print(profiler.format_report(limit=10))
+
+    # Make the results available in the application registry.
+    profiler.register_report(app.extensions['registry'])
+
+The snapshots cover the allocations of all threads, so the profiled steps of
+different threads (e.g. entry points loaded by ``EntryPointRegistry`` with
+several ``workers``) run one at a time while a ``MemoryProfiler`` is active.
+
+Import tracing and memory profiling require Python 3.4 or newer.
+"""
+
+from __future__ import absolute_import
+
+import sys
+import threading
+from collections import namedtuple
+from contextlib import contextmanager
+from timeit import default_timer
+
+try:
+    import tracemalloc
+except ImportError:  # Python < 3.4
+    tracemalloc = None
+
+from .registries.core import DictRegistry
+
+_profilers = []
+"""Active profilers."""
+
+_memory_step_lock = threading.RLock()
+"""Lock serializing the steps of the threads profiled by memory profilers."""
+
+
+@contextmanager
+def profile_step(package):
+    """
+    Report a step of the application assembly to the active profilers.
+
+    :param package: Name of the package, extension or entry point processed
+        in the step.
+    """
+    if not _profilers:
+        yield
+        return
+    profilers = list(_profilers)
+    for profiler in profilers:
+        profiler.start_step(package)
+    try:
+        yield
+    finally:
+        for profiler in reversed(profilers):
+            profiler.stop_step(package)
+
+
+class Profiler(object):
+    """
+    Base class for profilers of the application assembly.
+
+    Profilers are activated with ``start()`` and ``stop()`` or by using them
+    as a context manager. Subclasses implement ``start_step()`` and
+    ``stop_step()``.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+
+    @property
+    def _steps(self):
+        """Stack of the packages of the running steps in this thread."""
+        steps = getattr(self._local, 'steps', None)
+        if steps is None:
+            steps = self._local.steps = []
+        return steps
+
+    @property
+    def current_package(self):
+        """Package of the innermost running step or ``None``."""
+        steps = self._steps
+        return steps[-1] if steps else None
+
+    def start(self):
+        """Activate the profiler."""
+        _profilers.append(self)
+
+    def stop(self):
+        """Deactivate the profiler."""
+        _profilers.remove(self)
+
+    def start_step(self, package):
+        """Called when a step starts."""
+        self._steps.append(package)
+
+    def stop_step(self, package):
+        """Called when a step ends."""
+        self._steps.pop()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+ImportRecord = namedtuple(
+    'ImportRecord',
+    ['module', 'package', 'importer', 'self_time', 'cumulative_time']
+)
+"""Time spent importing a module. ``package`` is the package whose step
+triggered the import and ``importer`` the module which imported it."""
+
+
+def _instrument(loader, tracers):
+    """Wrap the ``exec_module`` method of a loader instance to report the
+    execution of the module to import tracers."""
+    # Loaders which are classes are shared by many modules, and loaders
+    # without instance dictionary cannot be wrapped.
+    if isinstance(loader, type) or \
+            not isinstance(getattr(loader, '__dict__', None), dict) or \
+            'exec_module' in loader.__dict__:
+        return
+    exec_module = getattr(loader, 'exec_module', None)
+    if exec_module is None:
+        return
+
+    def traced_exec_module(module):
+        for tracer in tracers:
+            tracer._enter(module.__name__)
+        try:
+            exec_module(module)
+        finally:
+            for tracer in reversed(tracers):
+                tracer._exit()
+
+    loader.exec_module = traced_exec_module
+    for tracer in tracers:
+        tracer._instrumented.append(loader)
+
+
+class _TracingFinder(object):
+    """
+    Meta path finder instrumenting the loaders of other finders.
+
+    The finder of each active tracer skips the finders of the other ones,
+    and instruments the loader for all of them.
+    """
+
+    def __init__(self, tracer):
+        self.tracer = tracer
+
+    def find_spec(self, fullname, path=None, target=None):
+        tracers = []
+        for finder in sys.meta_path:
+            if isinstance(finder, _TracingFinder):
+                tracers.append(finder.tracer)
+                continue
+            find_spec = getattr(finder, 'find_spec', None)
+            if find_spec is None:
+                continue
+            spec = find_spec(fullname, path, target)
+            if spec is not None:
+                _instrument(spec.loader, tracers)
+                return spec
+        return None
+
+
+class ImportTracer(Profiler):
+    """
+    Profiler attributing the time spent importing modules to packages.
+
+    The self time of a module is the time spent executing its body, without
+    the time spent importing other new modules. The cumulative time includes
+    them.
+    """
+
+    def __init__(self):
+        super(ImportTracer, self).__init__()
+        self.records = []
+        self._finder = _TracingFinder(self)
+        self._instrumented = []
+
+    @property
+    def _imports(self):
+        """Stack of ``[module, start, child_time]`` in this thread."""
+        imports = getattr(self._local, 'imports', None)
+        if imports is None:
+            imports = self._local.imports = []
+        return imports
+
+    def start(self):
+        """Start tracing imports."""
+        if sys.version_info < (3, 4):
+            raise RuntimeError('Import tracing requires Python 3.4+.')
+        sys.meta_path.insert(0, self._finder)
+        super(ImportTracer, self).start()
+
+    def stop(self):
+        """Stop tracing imports."""
+        super(ImportTracer, self).stop()
+        sys.meta_path.remove(self._finder)
+        for loader in self._instrumented:
+            loader.__dict__.pop('exec_module', None)
+        self._instrumented = []
+
+    def _enter(self, module):
+        self._imports.append([module, default_timer(), 0.0])
+
+    def _exit(self):
+        module, start, child_time = self._imports.pop()
+        cumulative_time = default_timer() - start
+        imports = self._imports
+        if imports:
+            imports[-1][2] += cumulative_time
+        self.records.append(ImportRecord(
+            module, self.current_package, imports[-1][0] if imports else None,
+            cumulative_time - child_time, cumulative_time
+        ))
+
+    def report(self, limit=None):
+        """
+        Rank the packages and dependencies by their import time.
+
+        :param limit: Maximum number of entries in each ranking.
+        :returns: Dictionary with the rankings ``packages`` (time of the
+            imports triggered by each package) and ``dependencies`` (time of
+            importing the modules of each top-level package). Entries are
+            ``(name, seconds, number of modules)`` tuples, slowest first.
+        """
+        packages = {}
+        dependencies = {}
+        for record in self.records:
+            for totals, key in ((packages, record.package),
+                                (dependencies, record.module.split('.')[0])):
+                seconds, count = totals.get(key, (0.0, 0))
+                totals[key] = (seconds + record.self_time, count + 1)
+
+        def rank(totals):
+            ranking = sorted(
+                ((name, seconds, count)
+                 for name, (seconds, count) in totals.items()),
+                key=lambda entry: entry[1], reverse=True
+            )
+            return ranking[:limit] if limit is not None else ranking
+
+        return {'packages': rank(packages), 'dependencies': rank(dependencies)}
+
+    def format_report(self, limit=None):
+        """
+        Format the report as text.
+
+        :param limit: Maximum number of entries in each ranking.
+        """
+        report = self.report(limit=limit)
+        lines = []
+        for title, key in (('Packages', 'packages'),
+                           ('Dependencies', 'dependencies')):
+            lines.append('%s:' % title)
+            for name, seconds, count in report[key]:
+                lines.append('  %10.2f ms  %5d modules  %s' % (
+                    seconds * 1000, count,
+                    name if name is not None else '(no package)'))
+        return '\n'.join(lines)
+
+
+MemoryRecord = namedtuple('MemoryRecord', ['package', 'size', 'count', 'top'])
+"""Memory allocated during a step. ``size`` and ``count`` are the number of
+bytes and memory blocks allocated and not freed by the step itself, without
+nested steps. ``top`` lists the largest ``(allocation site, size)`` pairs."""
+
+
+class MemoryProfiler(Profiler):
+    """
+    Profiler attributing the allocated memory to packages using
+    ``tracemalloc`` snapshots taken before and after each step.
+
+    If ``tracemalloc`` is not tracing yet, it is started and stopped together
+    with the profiler. Steps of different threads wait for each other, so
+    that each snapshot only contains the allocations of one step.
+
+    :param top: Number of the largest allocation sites recorded per step.
+        Defaults to ``5``.
+    """
+
+    def __init__(self, top=5):
+        super(MemoryProfiler, self).__init__()
+        self.top = top
+        self.records = []
+        self._started_tracing = False
+
+    @property
+    def _snapshots(self):
+        """Stack of ``[snapshot, child size, child count]`` in this thread."""
+        snapshots = getattr(self._local, 'snapshots', None)
+        if snapshots is None:
+            snapshots = self._local.snapshots = []
+        return snapshots
+
+    def start(self):
+        """Start profiling memory allocations."""
+        if tracemalloc is None:
+            raise RuntimeError('Memory profiling requires Python 3.4+.')
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        super(MemoryProfiler, self).start()
+
+    def stop(self):
+        """Stop profiling memory allocations."""
+        super(MemoryProfiler, self).stop()
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def _take_snapshot(self):
+        """Take a snapshot without the allocations of the profiler."""
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        ))
+
+    def start_step(self, package):
+        """Wait for the steps of other threads and take a snapshot."""
+        _memory_step_lock.acquire()
+        super(MemoryProfiler, self).start_step(package)
+        self._snapshots.append([self._take_snapshot(), 0, 0])
+
+    def stop_step(self, package):
+        """Compare the snapshots before and after the step."""
+        try:
+            before, child_size, child_count = self._snapshots.pop()
+            stats = self._take_snapshot().compare_to(before, 'lineno')
+            size = sum(stat.size_diff for stat in stats)
+            count = sum(stat.count_diff for stat in stats)
+            snapshots = self._snapshots
+            if snapshots:
+                snapshots[-1][1] += size
+                snapshots[-1][2] += count
+            top = sorted((stat for stat in stats if stat.size_diff > 0),
+                         key=lambda stat: stat.size_diff, reverse=True)
+            self.records.append(MemoryRecord(
+                package, size - child_size, count - child_count,
+                [(str(stat.traceback), stat.size_diff)
+                 for stat in top[:self.top]]
+            ))
+            super(MemoryProfiler, self).stop_step(package)
+        finally:
+            _memory_step_lock.release()
+
+    def report(self, limit=None):
+        """
+        Rank the packages by allocated memory.
+
+        :param limit: Maximum number of entries in the ranking.
+        :returns: List of ``(package, bytes, memory blocks)`` tuples, largest
+            first.
+        """
+        totals = {}
+        for record in self.records:
+            size, count = totals.get(record.package, (0, 0))
+            totals[record.package] = (size + record.size,
+                                      count + record.count)
+        ranking = sorted(
+            ((package, size, count)
+             for package, (size, count) in totals.items()),
+            key=lambda entry: entry[1], reverse=True
+        )
+        return ranking[:limit] if limit is not None else ranking
+
+    def format_report(self, limit=None):
+        """
+        Format the report as text.
+
+        :param limit: Maximum number of entries in the ranking.
+        """
+        return '\n'.join(
+            '  %10.1f KiB  %7d blocks  %s' % (size / 1024.0, count, package)
+            for package, size, count in self.report(limit=limit)
+        )
+
+    def register_report(self, registry, namespace='profiling.memory'):
+        """
+        Register the allocated bytes per package in a registry namespace.
+
+        :param registry: The ``Registry`` of the application.
+        :param namespace: Namespace of the ``DictRegistry`` mapping package
+            names to allocated bytes. Defaults to ``profiling.memory``.
+        """
+        report = DictRegistry()
+        for package, size, _ in self.report():
+            report.register(package, size)
+        registry[namespace] = report
+        return report
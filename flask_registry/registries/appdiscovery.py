@@ -118,6 +118,7 @@ from __future__ import absolute_import
 from flask import Blueprint, Config
 from werkzeug.utils import import_string
 
+from ..profiling import profile_step
 from .core import ImportPathRegistry, ListRegistry
 from .modulediscovery import (ModuleAutoDiscoveryRegistry,
                               ModuleDiscoveryRegistry)
@@ -154,10 +155,11 @@ class ExtensionRegistry(ListRegistry):
         :param ext_name: An import path (e.g. a package, module, object) which
             when loaded has an method ``setup_app()``.
         """
-        ext = import_string(ext_name)
-        super(ExtensionRegistry, self).register(ext_name)
-        ext = getattr(ext, 'setup_app', ext)
-        ext(app)
+        with profile_step(ext_name):
+            ext = import_string(ext_name)
+            super(ExtensionRegistry, self).register(ext_name)
+            ext = getattr(ext, 'setup_app', ext)
+            ext(app)
 
     def unregister(self):  # pylint: disable=W0221
         """
@@ -21,9 +21,22 @@ registries.
 
 from __future__ import absolute_import
 
-from werkzeug.utils import find_modules, import_string
+import os
+import pkgutil
+import re
+import threading
+import time
+import weakref
+from bisect import bisect_right
+from collections import OrderedDict
+from fnmatch import fnmatchcase
+from itertools import count
+from operator import itemgetter
+
+from werkzeug.utils import import_string
 
 from .. import RegistryBase, RegistryError
+from ..utils import _DottedTrie, _mtime
 
 try:
     from collections import Sequence, MutableMapping
@@ -31,7 +44,181 @@ except ImportError:
     from collections.abs import Sequence, MutableMapping
 
 
-class ListRegistry(RegistryBase, Sequence):
+def _count_lookup(registry, found):
+    """Count a lookup in a registry and return if the item was found."""
+    registry._metrics.count(registry.namespace, 'lookups')
+    if not found:
+        registry._metrics.count(registry.namespace, 'misses')
+    return found
+
+
+class _SecondaryIndex(object):
+    """
+    Mapping of index keys to the ``(key, item)`` pairs of a registry.
+
+    Each registration gets a slot in the buckets of its index keys. The
+    buckets are ordered by slot, so objects are found in registration order
+    and removed in constant time. The slots and index keys of each
+    registered object are kept, so an object can be removed even if its
+    index keys changed after it was registered.
+    """
+
+    def __init__(self, key, multi):
+        self.key = key
+        self.multi = multi
+        self.buckets = {}
+        self.entries = {}
+        self._slots = count()
+
+    def index_keys(self, item):
+        """Get the index keys of an item."""
+        if self.multi:
+            return set(self.key(item))
+        return (self.key(item), )
+
+    def add(self, key, item, index_keys):
+        slot = next(self._slots)
+        for index_key in index_keys:
+            bucket = self.buckets.get(index_key)
+            if bucket is None:
+                bucket = self.buckets[index_key] = OrderedDict()
+            bucket[slot] = (key, item)
+        self.entries.setdefault((key, id(item)), []).append(
+            (slot, index_keys))
+
+    def copy(self):
+        """Copy the index so that changing the copy leaves it unchanged."""
+        index = _SecondaryIndex(self.key, self.multi)
+        index.buckets = dict((index_key, OrderedDict(bucket))
+                             for index_key, bucket in self.buckets.items())
+        index.entries = dict((entry_id, list(registrations)) for
+                             entry_id, registrations in self.entries.items())
+        index._slots = self._slots
+        return index
+
+    def remove(self, key, item):
+        entry_id = (key, id(item))
+        registrations = self.entries[entry_id]
+        slot, index_keys = registrations.pop(0)
+        if not registrations:
+            del self.entries[entry_id]
+        for index_key in index_keys:
+            bucket = self.buckets[index_key]
+            del bucket[slot]
+            if not bucket:
+                del self.buckets[index_key]
+
+
+class IndexedRegistryMixin(object):
+    """
+    Secondary indexes for registries.
+
+    An index maps the result of a key function applied to each registered
+    object to the objects. Indexes are updated when objects are registered
+    and unregistered, so ``find()`` does not need to scan the registry:
+
+    .. doctest::
+
+        >>> from flask_registry import ListRegistry
+        >>> registry = ListRegistry()
+        >>> registry.add_index('length', len)
+        >>> registry.register('a')
+        >>> registry.register('bb')
+        >>> registry.register('cc')
+        >>> registry.find('length', 2)
+        ['bb', 'cc']
+        >>> registry.unregister('bb')
+        >>> registry.find('length', 2)
+        ['cc']
+
+    Subclasses call ``_index_add()`` and ``_index_remove()`` when they
+    change the registered objects without using the ``register()`` and
+    ``unregister()`` methods of ``ListRegistry`` and ``DictRegistry``.
+    """
+
+    _indexes = None
+
+    def add_index(self, name, key, multi=False):
+        """
+        Add a secondary index and index the already registered objects.
+
+        :param name: Name of the index.
+        :param key: Function returning the index key of an object. Index keys
+            must be hashable.
+        :param multi: If ``True``, the function returns an iterable of index
+            keys (e.g. capabilities of a plugin). Defaults to ``False``.
+        """
+        if self._indexes is None:
+            self._indexes = {}
+        if name in self._indexes:
+            raise RegistryError("Index %s already exists." % name)
+        index = _SecondaryIndex(key, multi)
+        for entry_key, item in self._index_entries():
+            index.add(entry_key, item, index.index_keys(item))
+        self._indexes[name] = index
+
+    def remove_index(self, name):
+        """
+        Remove a secondary index.
+
+        :param name: Name of the index.
+        """
+        del self._indexes[name]
+
+    def find(self, name, index_key):
+        """
+        Get the objects with a given index key in registration order.
+
+        :param name: Name of the index.
+        :param index_key: Index key to look up.
+        """
+        bucket = self._get_index(name).buckets.get(index_key, {})
+        return [item for _, item in bucket.values()]
+
+    def index_keys(self, name):
+        """
+        Get the index keys of at least one registered object.
+
+        :param name: Name of the index.
+        """
+        return list(self._get_index(name).buckets)
+
+    def _get_index(self, name):
+        try:
+            return (self._indexes or {})[name]
+        except KeyError:
+            raise RegistryError("Index %s does not exist." % name)
+
+    def _index_entries(self):
+        """Iterate the ``(key, item)`` pairs of the registered objects."""
+        raise NotImplementedError()
+
+    def _index_add(self, key, item):
+        """Index a registered object. Call it before changing the registry
+        so that a failing key function does not leave it inconsistent."""
+        self._index_add_many(((key, item), ))
+
+    def _index_add_many(self, entries):
+        """Index several ``(key, item)`` pairs. Nothing is indexed if a key
+        function fails."""
+        if not self._indexes:
+            return
+        updates = [(index, key, item, index.index_keys(item))
+                   for key, item in entries
+                   for index in self._indexes.values()]
+        for index, key, item, index_keys in updates:
+            index.add(key, item, index_keys)
+
+    def _index_remove(self, key, item):
+        """Remove an unregistered object from the indexes. The object must
+        be the registered one, not just an equal object."""
+        if not self._indexes:
+            return
+        for index in self._indexes.values():
+            index.remove(key, item)
+
+
+class ListRegistry(IndexedRegistryMixin, RegistryBase, Sequence):
     """Basic registry that just keeps a list of objects.
 
     Provides normal list-style access to the registry:
@@ -62,6 +249,8 @@ class ListRegistry(RegistryBase, Sequence):
 
     def __iter__(self):
         """ Get iterator """
+        if self._metrics is not None:
+            self._metrics.count(self.namespace, 'iterations')
         return iter(self.registry)
 
     def __len__(self):
@@ -74,6 +263,8 @@ class ListRegistry(RegistryBase, Sequence):
 
         :param item: Object instance
         """
+        if self._metrics is not None:
+            return _count_lookup(self, item in self.registry)
         return item in self.registry
 
     def __getitem__(self, idx):
@@ -82,7 +273,18 @@ class ListRegistry(RegistryBase, Sequence):
 
         :param idx: Index of object
         """
-        return self.registry[idx]
+        if self._metrics is None:
+            return self.registry[idx]
+        try:
+            item = self.registry[idx]
+        except IndexError:
+            _count_lookup(self, False)
+            raise
+        _count_lookup(self, True)
+        return item
+
+    def _index_entries(self):
+        return ((None, item) for item in self.registry)
 
     def register(self, item):  # pylint: disable=W0221
         """
@@ -90,7 +292,21 @@ class ListRegistry(RegistryBase, Sequence):
 
         :param item: Object to register
         """
+        self._index_add(None, item)
         self.registry.append(item)
+        self.bump_version()
+
+    def register_many(self, items):
+        """
+        Register several objects at once. It is faster than calling
+        ``register()`` for each object.
+
+        :param items: Iterable of objects to register.
+        """
+        items = list(items)
+        self._index_add_many((None, item) for item in items)
+        self.registry.extend(items)
+        self.bump_version()
 
     def unregister(self, item):  # pylint: disable=W0221
         """
@@ -100,10 +316,30 @@ class ListRegistry(RegistryBase, Sequence):
 
         :param item: Object to unregister
         """
-        self.registry.remove(item)
+        idx = self.registry.index(item)
+        item = self.registry[idx]
+        del self.registry[idx]
+        self._index_remove(None, item)
+        self.bump_version()
+
+
+class _Flight(object):
+    """Computation of a value which other threads can wait for."""
+
+    def __init__(self):
+        self.owner = threading.current_thread()
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
 
+    def wait(self):
+        self.done.wait()
+        if self.error is not None:
+            raise self.error
+        return self.value
 
-class DictRegistry(RegistryBase, MutableMapping):
+
+class DictRegistry(IndexedRegistryMixin, RegistryBase, MutableMapping):
 
     """
     Basic registry that just keeps a key, value pairs.
@@ -133,24 +369,38 @@ class DictRegistry(RegistryBase, MutableMapping):
     def __init__(self):
         super(DictRegistry, self).__init__()
         self.registry = {}
+        self._flights = {}
+        self._flights_lock = threading.Lock()
 
     def __iter__(self):
+        if self._metrics is not None:
+            self._metrics.count(self.namespace, 'iterations')
         return iter(self.registry)
 
     def __len__(self):
         return len(self.registry)
 
     def __contains__(self, item):
+        if self._metrics is not None:
+            return _count_lookup(self, item in self.registry)
         return item in self.registry
 
     def __getitem__(self, key):
-        return self.registry[key]
+        if self._metrics is None:
+            return self.registry[key]
+        try:
+            value = self.registry[key]
+        except KeyError:
+            _count_lookup(self, False)
+            raise
+        _count_lookup(self, True)
+        return value
 
     def __setitem__(self, key, value):
         return self.register(key, value)
 
     def __delitem__(self, key):
-        return self.registry.__delitem__(key)
+        self.unregister(key)
 
     def register(self, key, value):  # pylint: disable=W0221
         """
@@ -161,14 +411,778 @@ class DictRegistry(RegistryBase, MutableMapping):
         """
         if key in self.registry:
             raise RegistryError("Key %s already registered." % key)
+        self._index_add(key, value)
         self.registry[key] = value
+        self.bump_version()
+
+    def register_many(self, items):
+        """
+        Register several objects at once. It is faster than calling
+        ``register()`` for each object. If any key is already registered (or
+        given twice), a ``RegistryError`` is raised and no object is
+        registered.
+
+        :param items: Dictionary or iterable of ``(key, object)`` pairs.
+        """
+        items = self._check_new_items(items)
+        self._index_add_many(items)
+        self.registry.update(items)
+        self.bump_version()
+
+    def _check_new_items(self, items):
+        """
+        Get a list of ``(key, object)`` pairs with keys which are neither
+        registered nor duplicated.
+        """
+        items = list(items.items() if hasattr(items, 'items') else items)
+        keys = set(key for key, _ in items)
+        if len(keys) != len(items) or not keys.isdisjoint(self.registry):
+            keys = set(self.registry)
+            for key, _ in items:
+                if key in keys:
+                    raise RegistryError("Key %s already registered." % key)
+                keys.add(key)
+        return items
 
     def unregister(self, key):  # pylint: disable=W0221
         """
         Unregister an object under a given key. Raises ``KeyError`` in case
         the given key doesn't exists.
         """
+        value = self.registry.pop(key)
+        self._index_remove(key, value)
+        self.bump_version()
+
+    def get_or_compute(self, key, factory):
+        """
+        Get the object registered under a key, or compute and register it.
+
+        If several threads ask for the same missing key at once, the factory
+        is called only once and the other threads wait for its result (or
+        exception). Threads computing different keys do not wait for each
+        other.
+
+        .. doctest::
+
+            >>> from flask_registry import DictRegistry
+            >>> registry = DictRegistry()
+            >>> registry.get_or_compute('answer', lambda: 6 * 7)
+            42
+            >>> registry.get_or_compute('answer', lambda: 0)
+            42
+
+        :param key: Key of the object.
+        :param factory: Function without arguments computing the object.
+        """
+        try:
+            return self[key]
+        except KeyError:
+            pass
+
+        with self._flights_lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                if key in self:
+                    return self[key]
+                flight = self._flights[key] = _Flight()
+        if not leader:
+            if flight.owner is threading.current_thread():
+                raise RegistryError("Key %s is computed recursively." % key)
+            return flight.wait()
+
+        try:
+            value = factory()
+            try:
+                self.register(key, value)
+            except RegistryError:
+                # Registered meanwhile without ``get_or_compute()``.
+                value = self[key]
+        except BaseException as e:  # pylint: disable=W0703
+            flight.error = e
+            raise
+        else:
+            flight.value = value
+        finally:
+            with self._flights_lock:
+                del self._flights[key]
+            flight.done.set()
+        return value
+
+    def _index_entries(self):
+        return self.registry.items()
+
+
+class _CopyOnWriteMixin(object):
+    """
+    Registry whose objects and secondary indexes are replaced together.
+
+    Writers copy the objects and the indexes under ``_write_lock``, change
+    the copies and publish them as one state. Readers take no lock and see
+    either the old or the new state, so ``find()`` never returns an object
+    which is not registered yet (or anymore).
+    """
+
+    _state = (None, None)
+
+    @property
+    def registry(self):
+        """The registered objects. They must not be changed."""
+        return self._state[0]
+
+    @registry.setter
+    def registry(self, registry):
+        self._state = (registry, self._state[1])
+
+    @property
+    def _indexes(self):
+        return self._state[1]
+
+    def snapshot(self):
+        """Get the current registered objects. They must not be changed."""
+        return self.registry
+
+    def _publish(self, registry, added=(), removed=()):
+        """
+        Publish new objects with copies of the indexes updated by the
+        added and removed ``(key, item)`` pairs. The caller holds
+        ``_write_lock``.
+        """
+        indexes = self._state[1]
+        if indexes:
+            indexes = dict((name, index.copy())
+                           for name, index in indexes.items())
+            updates = [(index, key, item, index.index_keys(item))
+                       for key, item in added
+                       for index in indexes.values()]
+            for key, item in removed:
+                for index in indexes.values():
+                    index.remove(key, item)
+            for index, key, item, index_keys in updates:
+                index.add(key, item, index_keys)
+        self._state = (registry, indexes)
+        self.bump_version()
+
+    def add_index(self, name, key, multi=False):
+        """
+        Add a secondary index and index the already registered objects (see
+        ``IndexedRegistryMixin.add_index()``).
+        """
+        with self._write_lock:
+            registry, indexes = self._state
+            if name in (indexes or {}):
+                raise RegistryError("Index %s already exists." % name)
+            index = _SecondaryIndex(key, multi)
+            for entry_key, item in self._index_entries():
+                index.add(entry_key, item, index.index_keys(item))
+            indexes = dict(indexes or {})
+            indexes[name] = index
+            self._state = (registry, indexes)
+
+    def remove_index(self, name):
+        """
+        Remove a secondary index.
+
+        :param name: Name of the index.
+        """
+        with self._write_lock:
+            registry, indexes = self._state
+            indexes = dict(indexes or {})
+            del indexes[name]
+            self._state = (registry, indexes)
+
+
+class ConcurrentListRegistry(_CopyOnWriteMixin, ListRegistry):
+
+    """
+    List registry which can be read and changed from several threads.
+
+    Changes copy the list of objects and the secondary indexes under a lock
+    and replace them together once done (copy-on-write), so reads never take
+    a lock and never see a partially changed registry. Changes take linear
+    time, use ``register_many()`` to register many objects.
+
+    Reads which must see a consistent state across several calls should
+    work on a ``snapshot()``.
+    """
+
+    def __init__(self):
+        super(ConcurrentListRegistry, self).__init__()
+        self._write_lock = threading.Lock()
+
+    def register(self, item):
+        """
+        Register a new object.
+
+        :param item: Object to register.
+        """
+        with self._write_lock:
+            self._publish(self.registry + [item], added=((None, item), ))
+
+    def register_many(self, items):
+        """
+        Register several objects at once.
+
+        :param items: Iterable of objects to register.
+        """
+        items = list(items)
+        with self._write_lock:
+            self._publish(self.registry + items,
+                          added=[(None, item) for item in items])
+
+    def unregister(self, item):
+        """
+        Unregister an existing object. Raises a ``ValueError`` in case object
+        does not exists.
+
+        :param item: Object to unregister.
+        """
+        with self._write_lock:
+            registry = list(self.registry)
+            item = registry.pop(registry.index(item))
+            self._publish(registry, removed=((None, item), ))
+
+
+class ConcurrentDictRegistry(_CopyOnWriteMixin, DictRegistry):
+
+    """
+    Dictionary registry which can be read and changed from several threads.
+
+    Like ``ConcurrentListRegistry``, changes replace the dictionary of
+    objects and the secondary indexes under a lock (copy-on-write) and reads
+    do not take a lock. ``get_or_compute()`` can be used to register missing
+    objects once.
+    """
+
+    def __init__(self):
+        super(ConcurrentDictRegistry, self).__init__()
+        self._write_lock = threading.Lock()
+
+    def register(self, key, value):
+        """
+        Register a new object under a given key.
+
+        :param key: Key to register object under.
+        :param value: Object to register.
+        """
+        self.register_many(((key, value), ))
+
+    def register_many(self, items):
+        """
+        Register several objects at once. If any key is already registered,
+        no object is registered.
+
+        :param items: Dictionary or iterable of ``(key, object)`` pairs.
+        """
+        with self._write_lock:
+            items = self._check_new_items(items)
+            registry = dict(self.registry)
+            registry.update(items)
+            self._publish(registry, added=items)
+
+    def unregister(self, key):
+        """
+        Unregister an object under a given key. Raises ``KeyError`` in case
+        the given key doesn't exists.
+        """
+        with self._write_lock:
+            registry = dict(self.registry)
+            value = registry.pop(key)
+            self._publish(registry, removed=((key, value), ))
+
+
+class PriorityListRegistry(ListRegistry):
+
+    """
+    List registry which keeps the objects ordered by priority.
+
+    Objects with lower priority values come first. Objects with the same
+    priority keep their registration order. The position of a new object is
+    found by bisection, so iterating the registry never requires sorting:
+
+    .. doctest::
+
+        >>> from flask import Flask
+        >>> from flask_registry import Registry, PriorityListRegistry
+        >>> app = Flask('myapp')
+        >>> r = Registry(app=app)
+        >>> r['myns'] = PriorityListRegistry()
+        >>> r['myns'].register('last', priority=10)
+        >>> r['myns'].register('first', priority=-10)
+        >>> r['myns'].register('default')
+        >>> r['myns'].register('default too')
+        >>> for obj in r['myns']:
+        ...     print(obj)
+        first
+        default
+        default too
+        last
+
+    :param key: Function computing the priority of objects registered
+        without an explicit priority. Defaults to ``None`` (priority ``0``).
+    """
+
+    def __init__(self, key=None):
+        super(PriorityListRegistry, self).__init__()
+        self.key = key
+        self.priorities = []
+        """Priorities of the registered objects, in the same order."""
+
+    def register(self, item, priority=None):  # pylint: disable=W0221
+        """
+        Register a new object.
+
+        :param item: Object to register.
+        :param priority: Priority of the object. Defaults to the result of
+            the ``key`` function, or ``0`` without ``key`` function.
+        """
+        if priority is None:
+            priority = self.key(item) if self.key is not None else 0
+        idx = bisect_right(self.priorities, priority)
+        self._index_add(None, item)
+        self.priorities.insert(idx, priority)
+        self.registry.insert(idx, item)
+        self.bump_version()
+
+    def register_many(self, items, priority=None):
+        """
+        Register several objects at once. The new objects are merged with the
+        registered ones in a single sort instead of one insertion per object.
+
+        :param items: Iterable of objects to register.
+        :param priority: Priority of all objects. Defaults to the result of
+            the ``key`` function, or ``0`` without ``key`` function.
+        """
+        items = list(items)
+        if priority is None and self.key is not None:
+            priorities = [self.key(item) for item in items]
+        else:
+            priorities = [priority or 0] * len(items)
+        self._index_add_many((None, item) for item in items)
+        # The sort is stable, so registered objects stay in front of new ones
+        # with the same priority.
+        merged = sorted(zip(self.priorities + priorities,
+                            self.registry + items), key=itemgetter(0))
+        self.priorities[:] = [entry[0] for entry in merged]
+        self.registry[:] = [entry[1] for entry in merged]
+        self.bump_version()
+
+    def unregister(self, item):  # pylint: disable=W0221
+        """
+        Unregister an existing object. Raises a ``ValueError`` in case object
+        does not exists. If the same object was registered twice, only the
+        one which comes first is unregistered.
+
+        :param item: Object to unregister.
+        """
+        idx = self.registry.index(item)
+        item = self.registry.pop(idx)
+        del self.priorities[idx]
+        self._index_remove(None, item)
+        self.bump_version()
+
+
+def _weak_callback(registry):
+    """
+    Create the callback of the weak references held by a registry.
+
+    The callback only records the dead reference, so the registry is not
+    changed while it is iterated. The registry itself is referenced weakly
+    to not keep it alive.
+    """
+    registry_ref = weakref.ref(registry)
+
+    def callback(ref):
+        registry = registry_ref()
+        if registry is not None:
+            registry._dead.append(ref)
+            registry.bump_version()
+    return callback
+
+
+class WeakListRegistry(ListRegistry):
+
+    """
+    List registry which holds weak references to the registered objects.
+
+    Objects are removed from the registry once they are garbage collected, so
+    they do not need to be unregistered:
+
+    .. doctest::
+
+        >>> from flask_registry import WeakListRegistry
+        >>> class Job(object):
+        ...     pass
+        >>> registry = WeakListRegistry()
+        >>> job = Job()
+        >>> registry.register(job)
+        >>> len(registry)
+        1
+        >>> del job
+        >>> len(registry)
+        0
+
+    Dead references are skipped by iterations and membership tests and are
+    not counted by the length. They are removed once they make up more than
+    ``compact_fraction`` of the references, and before an access by index.
+    The objects must support weak references (e.g. instances of ``str`` or
+    ``int`` do not). Secondary indexes are not supported, because they would
+    keep the objects alive.
+    """
+
+    compact_fraction = 0.5
+    """Fraction of dead references above which they are removed."""
+
+    def __init__(self):
+        super(WeakListRegistry, self).__init__()
+        self._dead = []
+        self._callback = _weak_callback(self)
+
+    def _purge(self, force=False):
+        """
+        Remove the references to garbage collected objects if there are too
+        many of them.
+
+        :param force: Remove them if there are any.
+        """
+        dead = len(self._dead)
+        if not dead or not force and \
+                dead <= len(self.registry) * self.compact_fraction:
+            return
+        refs = [ref for ref in self.registry if ref() is not None]
+        self.registry[:] = refs
+        # Objects may die while the references are filtered.
+        alive = set(id(ref) for ref in refs)
+        self._dead[:] = [ref for ref in self._dead if id(ref) in alive]
+
+    def __iter__(self):
+        for ref in super(WeakListRegistry, self).__iter__():
+            item = ref()
+            if item is not None:
+                yield item
+
+    def __len__(self):
+        self._purge()
+        return len(self.registry) - len(self._dead)
+
+    def __contains__(self, item):
+        self._purge()
+        found = any(ref() == item for ref in self.registry)
+        if self._metrics is not None:
+            return _count_lookup(self, found)
+        return found
+
+    def __getitem__(self, idx):
+        self._purge(force=True)
+        ref = super(WeakListRegistry, self).__getitem__(idx)
+        if isinstance(idx, slice):
+            return [item() for item in ref]
+        return ref()
+
+    def add_index(self, name, key, multi=False):
+        """Secondary indexes are not supported."""
+        raise RegistryError("Weak registries do not support indexes.")
+
+    def register(self, item):
+        """
+        Register a new object.
+
+        :param item: Object to register.
+        """
+        self._purge()
+        self.registry.append(weakref.ref(item, self._callback))
+        self.bump_version()
+
+    def register_many(self, items):
+        """
+        Register several objects at once.
+
+        :param items: Iterable of objects to register.
+        """
+        self._purge()
+        self.registry.extend(
+            [weakref.ref(item, self._callback) for item in items])
+        self.bump_version()
+
+    def unregister(self, item):
+        """
+        Unregister an existing object. Raises a ``ValueError`` in case object
+        does not exists.
+
+        :param item: Object to unregister.
+        """
+        self._purge()
+        for idx, ref in enumerate(self.registry):
+            if ref() == item:
+                del self.registry[idx]
+                self.bump_version()
+                return
+        raise ValueError("Object is not registered.")
+
+
+class WeakDictRegistry(DictRegistry):
+
+    """
+    Dictionary registry which holds weak references to the registered
+    objects. The keys are held by strong references.
+
+    A key is removed from the registry once its object is garbage collected.
+    Removals are done at the next access of the registry in constant time
+    per removed key. The objects must support weak references and secondary
+    indexes are not supported (see ``WeakListRegistry``).
+    """
+
+    def __init__(self):
+        super(WeakDictRegistry, self).__init__()
+        self._dead = []
+        self._callback = _weak_callback(self)
+
+    def _purge(self):
+        """Remove the keys of garbage collected objects."""
+        while self._dead:
+            ref = self._dead.pop()
+            # The key may have been registered again meanwhile.
+            if self.registry.get(ref.key) is ref:
+                del self.registry[ref.key]
+
+    def __iter__(self):
+        self._purge()
+        return super(WeakDictRegistry, self).__iter__()
+
+    def __len__(self):
+        self._purge()
+        return super(WeakDictRegistry, self).__len__()
+
+    def __contains__(self, key):
+        self._purge()
+        return super(WeakDictRegistry, self).__contains__(key)
+
+    def __getitem__(self, key):
+        self._purge()
+        value = super(WeakDictRegistry, self).__getitem__(key)()
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def add_index(self, name, key, multi=False):
+        """Secondary indexes are not supported."""
+        raise RegistryError("Weak registries do not support indexes.")
+
+    def register(self, key, value):
+        """
+        Register a new object under a given key.
+
+        :param key: Key to register object under.
+        :param value: Object to register.
+        """
+        self._purge()
+        if key in self.registry:
+            raise RegistryError("Key %s already registered." % key)
+        self.registry[key] = weakref.KeyedRef(value, self._callback, key)
+        self.bump_version()
+
+    def register_many(self, items):
+        """
+        Register several objects at once. If any key is already registered,
+        no object is registered.
+
+        :param items: Dictionary or iterable of ``(key, object)`` pairs.
+        """
+        self._purge()
+        items = list(items.items() if hasattr(items, 'items') else items)
+        super(WeakDictRegistry, self).register_many([
+            (key, weakref.KeyedRef(value, self._callback, key))
+            for key, value in items
+        ])
+
+    def unregister(self, key):
+        """
+        Unregister an object under a given key. Raises ``KeyError`` in case
+        the given key doesn't exists.
+        """
+        self._purge()
+        del self.registry[key]
+        self.bump_version()
+
+
+class CacheRegistry(DictRegistry):
+
+    """
+    Dictionary registry with a bounded size, usable as a cache.
+
+    Once the registry is full, registering a new object evicts the least
+    recently used one. Objects may expire after a time to live. Accessing an
+    object by key marks it as recently used:
+
+    .. doctest::
+
+        >>> from flask_registry import CacheRegistry
+        >>> cache = CacheRegistry(max_size=2)
+        >>> cache.register('a', 1)
+        >>> cache.register('b', 2)
+        >>> cache['a']
+        1
+        >>> cache.register('c', 3)
+        >>> sorted(cache)
+        ['a', 'c']
+        >>> cache.get('b') is None
+        True
+        >>> for name, value in sorted(cache.stats().items()):
+        ...     print('%s: %s' % (name, value))
+        evictions: 1
+        expirations: 0
+        hits: 1
+        misses: 1
+
+    All operations take constant time. Expired objects are removed when they
+    are accessed, evicted or iterated over, so they count towards the length
+    of the registry until then (see ``purge_expired()``).
+
+    :param max_size: Maximum number of objects. Defaults to ``128``, ``None``
+        means unbounded.
+    :param ttl: Default time to live of the objects in seconds. Defaults to
+        ``None`` (objects do not expire).
+    """
+
+    timer = staticmethod(getattr(time, 'monotonic', time.time))
+    """Clock used for expiration times."""
+
+    def __init__(self, max_size=128, ttl=None):
+        super(CacheRegistry, self).__init__()
+        self.registry = OrderedDict()
+        self.max_size = max_size
+        self.ttl = ttl
+        self._expires = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _is_expired(self, key, now=None):
+        expires = self._expires.get(key)
+        return expires is not None and \
+            expires <= (self.timer() if now is None else now)
+
+    def _expire(self, key):
+        """Unregister an object if it expired."""
+        if self._is_expired(key):
+            self.unregister(key)
+            self.expirations += 1
+
+    def _evict(self):
+        """Evict the least recently used objects beyond the maximum size."""
+        if self.max_size is None:
+            return
+        while len(self.registry) > self.max_size:
+            key = next(iter(self.registry))
+            self.unregister(key)
+            self.evictions += 1
+
+    def __iter__(self):
+        self.purge_expired()
+        # Iterate a copy, as reading the values changes the LRU order.
+        return iter(list(super(CacheRegistry, self).__iter__()))
+
+    def __contains__(self, key):
+        self._expire(key)
+        return super(CacheRegistry, self).__contains__(key)
+
+    def __getitem__(self, key):
+        self._expire(key)
+        try:
+            value = super(CacheRegistry, self).__getitem__(key)
+        except KeyError:
+            self.misses += 1
+            raise
+        self.hits += 1
+        # Move the key to the end of the LRU order.
         del self.registry[key]
+        self.registry[key] = value
+        return value
+
+    def register(self, key, value, ttl=None):  # pylint: disable=W0221
+        """
+        Register a new object under a given key.
+
+        :param key: Key to register object under.
+        :param value: Object to register.
+        :param ttl: Time to live of the object in seconds. Defaults to the
+            ``ttl`` of the registry.
+        """
+        self._expire(key)
+        super(CacheRegistry, self).register(key, value)
+        self._set_ttl(key, ttl)
+        self._evict()
+
+    def register_many(self, items, ttl=None):  # pylint: disable=W0221
+        """
+        Register several objects at once. If any key is already registered,
+        no object is registered.
+
+        :param items: Dictionary or iterable of ``(key, object)`` pairs.
+        :param ttl: Time to live of the objects in seconds. Defaults to the
+            ``ttl`` of the registry.
+        """
+        items = list(items.items() if hasattr(items, 'items') else items)
+        for key, _ in items:
+            self._expire(key)
+        super(CacheRegistry, self).register_many(items)
+        for key, _ in items:
+            self._set_ttl(key, ttl)
+        self._evict()
+
+    def _set_ttl(self, key, ttl):
+        ttl = self.ttl if ttl is None else ttl
+        if ttl is not None:
+            self._expires[key] = self.timer() + ttl
+
+    def set(self, key, value, ttl=None):
+        """
+        Register an object under a given key, replacing the object which is
+        already registered under it.
+
+        :param key: Key to register object under.
+        :param value: Object to register.
+        :param ttl: Time to live of the object in seconds. Defaults to the
+            ``ttl`` of the registry.
+        """
+        if key in self.registry:
+            self.unregister(key)
+        self.register(key, value, ttl=ttl)
+
+    def unregister(self, key):
+        """
+        Unregister an object under a given key. Raises ``KeyError`` in case
+        the given key doesn't exists.
+        """
+        super(CacheRegistry, self).unregister(key)
+        self._expires.pop(key, None)
+
+    def purge_expired(self):
+        """Unregister all expired objects. It takes linear time."""
+        now = self.timer()
+        for key in [key for key in self._expires
+                    if self._is_expired(key, now)]:
+            self.unregister(key)
+            self.expirations += 1
+
+    def stats(self):
+        """
+        Get the cache statistics.
+
+        :returns: Dictionary with the number of ``hits``, ``misses``,
+            ``evictions`` and ``expirations``.
+        """
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+        }
+
+    def reset_stats(self):
+        """Reset the cache statistics."""
+        self.hits = self.misses = self.evictions = self.expirations = 0
 
 
 class SingletonRegistry(RegistryBase):
@@ -212,6 +1226,7 @@ class SingletonRegistry(RegistryBase):
         if self._singleton is not None:
             raise RegistryError("Object already registered.")
         self._singleton = obj
+        self.bump_version()
 
     def unregister(self):
         """
@@ -220,6 +1235,7 @@ class SingletonRegistry(RegistryBase):
         if self._singleton is None:
             raise RegistryError("No object to unregister.")
         self._singleton = None
+        self.bump_version()
 
     def get(self):
         """
@@ -228,6 +1244,186 @@ class SingletonRegistry(RegistryBase):
         return self._singleton
 
 
+_package_listing_cache = {}
+"""Cache of package listings keyed by the package search paths."""
+
+
+def _is_wildcard(segment):
+    """Check if an import path segment contains glob characters."""
+    return '*' in segment or '?' in segment
+
+
+def _list_package(paths):
+    """
+    List the direct submodules of a package as ``(name, is_package)`` pairs.
+
+    Listings are cached per package and invalidated when the modification
+    time of one of the package directories changes.
+
+    :param paths: Package search paths (i.e. the ``__path__`` of a package).
+    """
+    key = tuple(paths)
+    mtimes = tuple(_mtime(path) for path in key)
+    cached = _package_listing_cache.get(key)
+    if cached is not None and cached[0] == mtimes:
+        return cached[1]
+    listing = tuple(
+        (name, ispkg) for _, name, ispkg in pkgutil.iter_modules(list(key))
+    )
+    _package_listing_cache[key] = (mtimes, listing)
+    return listing
+
+
+def _subpackage_paths(paths, name):
+    """Get the search paths of a subpackage without importing it."""
+    return [os.path.join(path, name) for path in paths
+            if os.path.isdir(os.path.join(path, name))]
+
+
+def _walk_import_path(prefix, paths, segments):
+    """
+    Find all modules below a package matching the given path segments.
+
+    A ``**`` segment matches zero or more levels of packages, while other
+    segments are matched against module names using ``fnmatch`` rules.
+    Modules are yielded in the same order as ``werkzeug.utils.find_modules``.
+    """
+    head, rest = segments[0], segments[1:]
+    if head == '**':
+        if rest:
+            for mod_path in _walk_import_path(prefix, paths, rest):
+                yield mod_path
+        for name, ispkg in _list_package(paths):
+            mod_path = prefix + '.' + name
+            if not rest:
+                yield mod_path
+            if ispkg:
+                for sub_path in _walk_import_path(
+                        mod_path, _subpackage_paths(paths, name), segments):
+                    yield sub_path
+        return
+
+    for name, ispkg in _list_package(paths):
+        if not fnmatchcase(name, head):
+            continue
+        mod_path = prefix + '.' + name
+        if not rest:
+            yield mod_path
+        elif ispkg:
+            for sub_path in _walk_import_path(
+                    mod_path, _subpackage_paths(paths, name), rest):
+                yield sub_path
+
+
+def expand_import_path(import_path):
+    """
+    Expand an import path pattern into a list of import paths.
+
+    Only the package in front of the first wildcard segment is imported,
+    subpackages are found by scanning their directories. Directory listings
+    are cached until the modification time of the directory changes.
+
+    .. doctest::
+
+        >>> from flask_registry.registries.core import expand_import_path
+        >>> expand_import_path('flask_registry.**.core')
+        ['flask_registry.registries.core']
+
+    :param import_path: Python import path which may contain ``*`` (any
+        module name in a package) or ``**`` (any number of subpackages)
+        segments, e.g. ``somepackage.*`` or ``somepackage.**.views``.
+    :raise ValueError: if the part in front of the first wildcard is not a
+        package.
+    """
+    segments = import_path.split('.')
+    for idx, segment in enumerate(segments):
+        if _is_wildcard(segment):
+            break
+    else:
+        return [import_path]
+
+    prefix = '.'.join(segments[:idx])
+    paths = getattr(import_string(prefix), '__path__', None) \
+        if prefix else None
+    if paths is None:
+        raise ValueError('%r is not a package' % prefix)
+
+    result = []
+    seen = set()
+    for mod_path in _walk_import_path(prefix, list(paths), segments[idx:]):
+        if mod_path not in seen:
+            seen.add(mod_path)
+            result.append(mod_path)
+    return result
+
+
+def _glob_to_regex(pattern):
+    """
+    Translate an import path glob into a regular expression.
+
+    ``**`` matches any number of path segments, ``*`` any sequence of
+    characters within one path segment and ``?`` a single character.
+    """
+    tokens = {'.**.': r'\.(?:.*\.)?', '**': '.*', '*': '[^.]*', '?': '[^.]'}
+    return ''.join(
+        tokens.get(token) or re.escape(token)
+        for token in re.split(r'(\.\*\*\.|\*\*|\*|\?)', pattern)
+    )
+
+
+def _fullmatch(regex):
+    """Get a function matching a compiled regular expression against a
+    whole string."""
+    fullmatch = getattr(regex, 'fullmatch', None)
+    if fullmatch is None:  # Python 2
+        fullmatch = re.compile('(?:%s)\\Z' % regex.pattern, regex.flags).match
+    return fullmatch
+
+
+def compile_exclude(patterns):
+    """
+    Compile a list of exclude patterns into a single matcher function.
+
+    Each pattern may be a full import path, an import path glob (see
+    ``expand_import_path``) or a compiled regular expression.
+
+    .. doctest::
+
+        >>> import re
+        >>> from flask_registry.registries.core import compile_exclude
+        >>> excluded = compile_exclude(['pkg.**.tests', re.compile('.*_old$')])
+        >>> excluded('pkg.sub.tests'), excluded('pkg.views_old')
+        (True, True)
+        >>> excluded('pkg.views')
+        False
+
+    :param patterns: List of exclude patterns.
+    :returns: Function taking an import path and returning ``True`` if it
+        matches any of the patterns.
+    """
+    exact = set()
+    globs = []
+    matchers = []
+    for pattern in patterns or []:
+        if hasattr(pattern, 'pattern'):
+            # Compiled regular expressions keep their own flags.
+            matchers.append(_fullmatch(pattern))
+        elif any(_is_wildcard(segment) for segment in pattern.split('.')):
+            globs.append('(?:%s)' % _glob_to_regex(pattern))
+        else:
+            exact.add(pattern)
+
+    if globs:
+        matchers.insert(0, re.compile('(?:%s)\\Z' % '|'.join(globs)).match)
+    if not matchers:
+        return exact.__contains__
+
+    def excluded(import_path):
+        return import_path in exact or any(
+            match(import_path) is not None for match in matchers)
+    return excluded
+
+
 class ImportPathRegistry(ListRegistry):
 
     """
@@ -266,9 +1462,24 @@ class ImportPathRegistry(ListRegistry):
         flask_registry.registries.modulediscovery
         flask_registry.registries.pkgresources
 
+    Exclude patterns may be globs or compiled regular expressions, and
+    recursive star imports (``'**'``) find modules in all subpackages:
+
+    .. doctest::
+
+        >>> r['myns3'] = ImportPathRegistry(
+        ... initial=['flask_registry.**.core'],
+        ... exclude=['flask_registry.*.appdiscovery']
+        ... )
+        >>> for imp_path in r['myns3']:
+        ...     print(imp_path)
+        flask_registry.registries.core
+
     :param initial: List of initial import paths.
     :param exclude: A list of import paths to not register. Useful together
-        with star imports (``'*'``). Defaults to ``[]``.
+        with star imports (``'*'``). Entries may also be import path globs
+        (e.g. ``'mypackage.**.tests'``) or compiled regular expressions.
+        Defaults to ``[]``.
     :param load_modules: Load the modules instead of just registering the
         import path. Defaults to ``False``.
 
@@ -278,6 +1489,7 @@ class ImportPathRegistry(ListRegistry):
         super(ImportPathRegistry, self).__init__()
         self.load_modules = load_modules
         self.exclude = exclude or []
+        self._excluded = compile_exclude(self.exclude)
         if initial:
             for import_path in initial:
                 self.register(import_path)
@@ -286,25 +1498,33 @@ class ImportPathRegistry(ListRegistry):
         """ Load module behind an import path """
         return import_string(import_path) if self.load_modules else import_path
 
+    def register_many(self, import_paths):
+        """
+        Register several import paths at once. If an import path cannot be
+        expanded or loaded, none of them is registered.
+
+        :param import_paths: Iterable of import paths (see ``register()``).
+        """
+        super(ImportPathRegistry, self).register_many([
+            self._load_import_path(mod_path)
+            for import_path in import_paths
+            for mod_path in expand_import_path(import_path)
+            if not self._excluded(mod_path)
+        ])
+
     def register(self, import_path):
         """
         Register a new import path.
 
         :param import_path: A full Python import path (e.g.
             ``somepackge.somemodule``) or Python star import path to find all
-            modules inside a package (e.g. ``somepackge.*``).
-        """
-        if import_path.endswith('.*'):
-            for mod_path in find_modules(import_path[:-2],
-                                         include_packages=True):
-                if mod_path not in self.exclude:
-                    super(ImportPathRegistry, self).register(
-                        self._load_import_path(mod_path)
-                    )
-        else:
-            if import_path not in self.exclude:
+            modules inside a package (e.g. ``somepackge.*``). Use ``**`` to
+            search all subpackages (e.g. ``somepackage.**.views``).
+        """
+        for mod_path in expand_import_path(import_path):
+            if not self._excluded(mod_path):
                 super(ImportPathRegistry, self).register(
-                    self._load_import_path(import_path)
+                    self._load_import_path(mod_path)
                 )
 
     def unregister(self, *args, **kwargs):
@@ -312,6 +1532,79 @@ class ImportPathRegistry(ListRegistry):
         raise NotImplementedError()
 
 
+def _import_path_of(item):
+    """Get the import path of a registered import path or module."""
+    return getattr(item, '__name__', item)
+
+
+class IndexedImportPathRegistry(ImportPathRegistry):
+
+    """
+    ``ImportPathRegistry`` which indexes the import paths in a trie of their
+    segments.
+
+    Membership tests and queries for the import paths in a package take
+    time proportional to the depth of the package and the number of import
+    paths found, instead of scanning the registry:
+
+    .. doctest::
+
+        >>> from flask_registry import IndexedImportPathRegistry
+        >>> r = IndexedImportPathRegistry(initial=['flask_registry.**'])
+        >>> for import_path in r.subtree('flask_registry.registries'):
+        ...     print(import_path)
+        flask_registry.registries
+        flask_registry.registries.appdiscovery
+        flask_registry.registries.core
+        flask_registry.registries.modulediscovery
+        flask_registry.registries.pkgresources
+        >>> r.prefixed('flask_registry.registries.mod')
+        ['flask_registry.registries.modulediscovery']
+        >>> 'flask_registry.registries.core' in r
+        True
+
+    Results are sorted by import path. If modules are loaded, they are
+    indexed by their ``__name__``.
+    """
+
+    def __init__(self, initial=None, exclude=None, load_modules=False):
+        self._trie = _DottedTrie()
+        super(IndexedImportPathRegistry, self).__init__(
+            initial=initial, exclude=exclude, load_modules=load_modules
+        )
+
+    def _index_add_many(self, entries):
+        entries = list(entries)
+        super(IndexedImportPathRegistry, self)._index_add_many(entries)
+        for _, item in entries:
+            self._trie.add(_import_path_of(item), item)
+
+    def __contains__(self, item):
+        import_path = _import_path_of(item)
+        found = hasattr(import_path, 'split') and \
+            item in self._trie.get(import_path)
+        if self._metrics is not None:
+            return _count_lookup(self, found)
+        return found
+
+    def subtree(self, import_path):
+        """
+        Get the registered import paths (or modules) which are equal to or
+        inside an import path.
+
+        :param import_path: Import path of a package or module.
+        """
+        return [item for _, item in self._trie.iter_subtree(import_path)]
+
+    def prefixed(self, prefix):
+        """
+        Get the registered import paths (or modules) starting with a string.
+
+        :param prefix: Start of the import paths, e.g. ``mypackage.mod``.
+        """
+        return [item for _, item in self._trie.iter_prefix(prefix)]
+
+
 class ModuleRegistry(ListRegistry):
 
     """
@@ -363,6 +1656,23 @@ class ModuleRegistry(ListRegistry):
             if setup_func and callable(setup_func):
                 setup_func(*args, **kwargs)
 
+    def register_many(self, modules, *args, **kwargs):
+        """
+        Register several modules at once. All modules are registered before
+        their setup functions are called in order.
+
+        :param modules: Iterable of modules to register.
+        :param args: Argument passed to the module setup functions.
+        :param kwargs: Keyword argument passed to the module setup functions.
+        """
+        modules = list(modules)
+        super(ModuleRegistry, self).register_many(modules)
+        if self.with_setup:
+            for module in modules:
+                setup_func = getattr(module, self.setup_func_name, None)
+                if setup_func and callable(setup_func):
+                    setup_func(*args, **kwargs)
+
     def unregister(self, module, *args, **kwargs):
         """
         TODO.
@@ -72,11 +72,23 @@ lazy loading looks like this:
     >>> 'mydiscoveredmodules' in r
     True
 
+Alternatively the discovery can be deferred until the registry is first
+used:
+
+.. doctest::
+
+    >>> r['lazymodules'] = ModuleDiscoveryRegistry(
+    ...     'helpers', registry_namespace='mypackages', lazy=True)
+    >>> with app.app_context():
+    ...     len(r['lazymodules'])
+    1
+
 """
 
 from __future__ import absolute_import
 
 import sys
+import threading
 
 import six
 from flask import current_app, has_app_context
@@ -84,6 +96,7 @@ from werkzeug._compat import reraise
 from werkzeug.utils import find_modules, import_string
 
 from .. import RegistryBase, RegistryError, RegistryProxy
+from ..profiling import profile_step
 from .core import ModuleRegistry
 
 
@@ -119,10 +132,18 @@ class ModuleDiscoveryRegistry(ModuleRegistry):
         Defaults to ``False`` (see ``ModuleRegistry``).
     :param silent: if set to True import errors are ignored. Defaults to
         ``False``.
+    :param lazy: if set to True the discovery is run automatically, once,
+        when the registry is first accessed (iterated, indexed, queried for
+        its length or membership). It requires a Flask application context
+        at that time. If it fails, the discovered modules are unregistered
+        (calling their teardown functions) and the next access retries it,
+        so subclasses whose ``unregister()`` cannot undo ``register()``
+        (e.g. ``ConfigurationRegistry``) do not support it. Defaults to
+        ``False``.
     """
 
     def __init__(self, module_name, registry_namespace=None, with_setup=False,
-                 silent=False):
+                 silent=False, lazy=False):
         """
         TODO.
 
@@ -142,8 +163,56 @@ class ModuleDiscoveryRegistry(ModuleRegistry):
         # Setup config variable prefix
         self.cfg_var_prefix = self.registry_namespace.upper()
         self.cfg_var_prefix = self.cfg_var_prefix.replace('.', '_')
+        self._discovery_pending = lazy
+        self._discovery_lock = threading.RLock()
+        self._discovering = None
         super(ModuleDiscoveryRegistry, self).__init__(with_setup=with_setup)
 
+    def _ensure_discovered(self):
+        """
+        Run a pending lazy discovery exactly once.
+
+        Other threads wait until the discovery is finished. The discovering
+        thread itself sees the modules discovered so far. If the discovery
+        fails, the modules it registered are unregistered again, last first,
+        so that the next access can retry it.
+        """
+        if not self._discovery_pending or \
+                self._discovering is threading.current_thread():
+            return
+        with self._discovery_lock:
+            if not self._discovery_pending:
+                return
+            start = len(self.registry)
+            try:
+                self.discover(app=getattr(self, 'app', None))
+            except Exception:
+                exc_info = sys.exc_info()
+                self._discovering = threading.current_thread()
+                try:
+                    for module in reversed(self.registry[start:]):
+                        self.unregister(module)
+                finally:
+                    self._discovering = None
+                self._discovery_pending = True
+                reraise(*exc_info)
+
+    def __iter__(self):
+        self._ensure_discovered()
+        return super(ModuleDiscoveryRegistry, self).__iter__()
+
+    def __len__(self):
+        self._ensure_discovered()
+        return super(ModuleDiscoveryRegistry, self).__len__()
+
+    def __contains__(self, item):
+        self._ensure_discovered()
+        return super(ModuleDiscoveryRegistry, self).__contains__(item)
+
+    def __getitem__(self, idx):
+        self._ensure_discovered()
+        return super(ModuleDiscoveryRegistry, self).__getitem__(idx)
+
     def discover(self, app=None):
         """
         Perform module discovery.
@@ -156,6 +225,25 @@ class ModuleDiscoveryRegistry(ModuleRegistry):
             ``current_app`` if not specified (thus requires you are working
             in the Flask application context).
         """
+        with self._discovery_lock:
+            self._discovering = threading.current_thread()
+            try:
+                for pkg in self._iter_packages(app=app):
+                    with profile_step(pkg):
+                        self._discover_module(pkg)
+            finally:
+                self._discovering = None
+            # A pending lazy discovery is replaced by this one.
+            self._discovery_pending = False
+
+    def _iter_packages(self, app=None):
+        """
+        Iterate over the names of the packages to discover modules in.
+
+        Packages excluded in the application configuration are skipped.
+
+        :param app: Flask application object. Defaults to ``current_app``.
+        """
         if app is None and has_app_context():
             app = current_app
         if app is None:
@@ -173,7 +261,7 @@ class ModuleDiscoveryRegistry(ModuleRegistry):
             if pkg in blacklist:
                 continue
 
-            self._discover_module(pkg)
+            yield pkg
 
     def _discover_module(self, pkg):
         """
@@ -242,15 +330,19 @@ class ModuleAutoDiscoveryRegistry(ModuleDiscoveryRegistry):
         Defaults to ``False`` (see ``ModuleRegistry``).
     :param silent: if set to True import errors are ignored. Defaults to
         ``False``.
+    :param lazy: if set to True the discovery is deferred until the registry
+        is first accessed (see ``ModuleDiscoveryRegistry``). Defaults to
+        ``False``.
     """
 
     def __init__(self, module_name, app=None, registry_namespace=None,
-                 with_setup=False, silent=False):
+                 with_setup=False, silent=False, lazy=False):
         super(ModuleAutoDiscoveryRegistry, self).__init__(
             module_name, with_setup=with_setup, silent=silent,
-            registry_namespace=registry_namespace
+            registry_namespace=registry_namespace, lazy=lazy
         )
         if app is None and has_app_context():
             app = current_app
         self.app = app
-        self.discover(app=app)
+        if not lazy:
+            self.discover(app=app)
@@ -65,7 +65,7 @@ Assume e.g. a package ``tests`` have a directory ``resources`` with one file
 in it called ``testresource.cfg``. This file can be discovered in the following
 manner:
 
->>> import os
+>>> import os, tempfile
 >>> app = Flask('myapp')
 >>> r = Registry(app=app)
 >>> from flask_registry import ImportPathRegistry
@@ -74,19 +74,324 @@ manner:
 >>> r['res'] = PkgResourcesDirDiscoveryRegistry('resources', app=app)
 >>> os.path.basename(r['res'][0]) == 'testresource.cfg'
 True
+
+Resource directories may also be searched recursively and filtered by file
+name patterns:
+
+>>> r['cfg'] = PkgResourcesDirDiscoveryRegistry(
+...     'resources', app=app, recursive=True, patterns=['*.cfg'])
+>>> os.path.basename(r['cfg'][0]) == 'testresource.cfg'
+True
+
+To process large numbers of resource files without keeping them in a
+registry, iterate over them with ``iter_resource_files``:
+
+>>> from flask_registry.registries.pkgresources import iter_resource_files
+>>> for path in iter_resource_files(r['packages'], 'resources'):
+...     print(os.path.basename(path))
+testresource.cfg
+
+The content of discovered files can be read without copying it into memory,
+as the files are memory-mapped and shared with other processes reading them:
+
+>>> buf = r['res'].read_resource(r['res'][0])
+>>> buf.readonly
+True
+>>> len(buf) == os.path.getsize(r['res'][0])
+True
+
+Resource index
+^^^^^^^^^^^^^^
+The ``ResourceIndexRegistry`` indexes the discovered files by their name
+relative to the resource directory. If several packages provide a resource
+with the same name, the package listed last in ``PACKAGES`` wins:
+
+>>> from flask_registry import ResourceIndexRegistry
+>>> r['resindex'] = ResourceIndexRegistry('resources', app=app)
+>>> os.path.basename(r['resindex'].lookup('testresource.cfg'))
+'testresource.cfg'
+>>> r['resindex'].lookup('missing.cfg') is None
+True
+
+The index can be used as a Jinja template loader which replaces searching
+through the template folders of many blueprints:
+
+.. code-block:: python
+
+    from flask_registry.registries.pkgresources import ResourceIndexLoader
+
+    r['templates'] = ResourceIndexRegistry('templates', app=app)
+    app.jinja_loader = ResourceIndexLoader(r['templates'])
+
+Static files
+^^^^^^^^^^^^
+The ``StaticResourceRegistry`` computes a content hash and a gzip compressed
+copy of each discovered file, which can be used to answer conditional and
+compressed requests without reading the file:
+
+>>> from flask_registry import StaticResourceRegistry
+>>> r['static'] = StaticResourceRegistry(
+...     'resources', app=app, cache_dir=tempfile.mkdtemp())
+>>> info = r['static'].get_resource_info('testresource.cfg')
+>>> info.size == os.path.getsize(info.path)
+True
 """
 
 from __future__ import absolute_import
 
+import gzip
+import hashlib
+import io
+import json
+import mmap
 import os
+import re
+import sys
+import threading
+from collections import OrderedDict, namedtuple
+from fnmatch import translate
 
-from pkg_resources import iter_entry_points, resource_isdir, resource_listdir
+import six
+from jinja2 import BaseLoader, TemplateNotFound
+from jinja2.loaders import split_template_path
+from pkg_resources import EntryPoint, split_sections, working_set
 from werkzeug.utils import import_string
 
+try:
+    from concurrent.futures import ThreadPoolExecutor
+except ImportError:  # Python 2 without the futures backport
+    ThreadPoolExecutor = None
+
+from .. import RegistryError
+from ..profiling import profile_step
+from ..utils import _mtime, _write_atomic
 from .core import DictRegistry
 from .modulediscovery import ModuleAutoDiscoveryRegistry
 
 
+def distribution_metadata_key(paths=None):
+    """
+    Compute a key which changes when distributions are installed, removed
+    or updated.
+
+    The key is a hash of the search path and the modification times of the
+    ``.dist-info``, ``.egg-info`` and ``.egg`` entries found on it.
+
+    :param paths: List of paths to search. Defaults to ``sys.path``.
+    """
+    key = []
+    for entry in (sys.path if paths is None else paths):
+        try:
+            names = sorted(os.listdir(entry or '.'))
+        except OSError:
+            key.append((entry, _mtime(entry)))
+            continue
+        key.append((entry, [
+            (name, _mtime(os.path.join(entry, name))) for name in names
+            if name.endswith(('.dist-info', '.egg-info', '.egg', '.egg-link'))
+        ]))
+    return hashlib.sha1(json.dumps(key).encode('utf-8')).hexdigest()
+
+
+class EntryPointRecord(object):
+    """
+    Compact record of an entry point in the ``EntryPointIndex``.
+
+    The entry point is only parsed when it is requested.
+    """
+
+    __slots__ = ('name', 'value', 'dist', '_entry_point')
+
+    def __init__(self, name, value, dist):
+        self.name = name
+        self.value = value
+        self.dist = dist
+        self._entry_point = None
+
+    @property
+    def entry_point(self):
+        """The parsed ``pkg_resources.EntryPoint``."""
+        if self._entry_point is None:
+            dist = self.dist
+            if isinstance(dist, six.string_types):
+                # Records loaded from a cache file only know the project key.
+                dist = working_set.by_key.get(dist)
+            self._entry_point = EntryPoint.parse(
+                '%s = %s' % (self.name, self.value), dist=dist)
+        return self._entry_point
+
+
+_ENTRY_POINT_INDEX_FORMAT = 2
+"""Version of the format of the ``EntryPointIndex`` cache files."""
+
+
+class EntryPointIndex(object):
+    """
+    Index of the entry points of all installed distributions by group and
+    name.
+
+    The metadata of the distributions is read once, when the index is built.
+    Entry points are kept in the order of the distributions in the working
+    set, like ``pkg_resources`` yields them.
+
+    :param groups: Dictionary mapping groups to lists of
+        ``EntryPointRecord`` in distribution order.
+    """
+
+    def __init__(self, groups):
+        self.groups = groups
+        self.names = {}
+        """Records of each group by entry point name."""
+        for group, records in groups.items():
+            names = self.names[group] = {}
+            for record in records:
+                names.setdefault(record.name, []).append(record)
+
+    @classmethod
+    def from_working_set(cls, distributions=None):
+        """
+        Build the index by reading the ``entry_points.txt`` metadata of the
+        distributions.
+
+        :param distributions: Iterable of distributions. Defaults to the
+            ``pkg_resources`` working set.
+        """
+        groups = {}
+        for dist in (working_set if distributions is None else distributions):
+            if not dist.has_metadata('entry_points.txt'):
+                continue
+            metadata = dist.get_metadata('entry_points.txt')
+            for group, lines in split_sections(metadata):
+                if group is None:
+                    continue
+                records = groups.setdefault(group, [])
+                for line in lines:
+                    name, _, value = line.partition('=')
+                    records.append(
+                        EntryPointRecord(name.strip(), value.strip(), dist))
+        return cls(groups)
+
+    @classmethod
+    def load(cls, path, key):
+        """
+        Load an index from a cache file.
+
+        :param path: Path of the cache file.
+        :param key: Expected key of the cache file (see
+            ``distribution_metadata_key()``).
+        :returns: The index or ``None`` if the file does not exist, cannot
+            be read or was written for another key.
+        """
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (IOError, OSError, ValueError):
+            return None
+        if data.get('key') != key or \
+                data.get('format') != _ENTRY_POINT_INDEX_FORMAT:
+            return None
+        return cls(dict(
+            (group, [EntryPointRecord(name, value, dist)
+                     for name, value, dist in entries])
+            for group, entries in data['groups'].items()
+        ))
+
+    def save(self, path, key):
+        """
+        Save the index to a cache file.
+
+        :param path: Path of the cache file.
+        :param key: Key of the cache file (see
+            ``distribution_metadata_key()``).
+        """
+        groups = {}
+        for group, records in self.groups.items():
+            groups[group] = [
+                (record.name, record.value,
+                 record.dist if isinstance(record.dist, six.string_types)
+                 else getattr(record.dist, 'key', None))
+                for record in records
+            ]
+        _write_atomic(path, json.dumps({
+            'key': key, 'format': _ENTRY_POINT_INDEX_FORMAT,
+            'groups': groups}))
+
+    def iter_entry_points(self, group, name=None):
+        """
+        Iterate over the entry points of a group.
+
+        :param group: Entry point group.
+        :param name: If given, only the entry points with this name.
+        """
+        if name is None:
+            records = self.groups.get(group, ())
+        else:
+            records = self.names.get(group, {}).get(name, ())
+        for record in records:
+            yield record.entry_point
+
+
+_entry_point_index = None
+_entry_point_index_files = set()
+_entry_point_index_lock = threading.Lock()
+
+
+def get_entry_point_index(cache_file=None):
+    """
+    Get the process-wide ``EntryPointIndex``, building it if needed.
+
+    :param cache_file: Path of a file to cache the index in between
+        processes. If the installed distributions did not change since the
+        file was written, the index is read from it instead of from the
+        metadata of every distribution. If the index was already built
+        without it, the index is written to the file. Defaults to ``None``
+        (no caching).
+    """
+    global _entry_point_index
+    index = _entry_point_index
+    if index is not None and (cache_file is None or
+                              cache_file in _entry_point_index_files):
+        return index
+    with _entry_point_index_lock:
+        if cache_file is not None:
+            key = distribution_metadata_key()
+        if _entry_point_index is None:
+            index = None
+            if cache_file is not None:
+                index = EntryPointIndex.load(cache_file, key)
+            if index is None:
+                index = EntryPointIndex.from_working_set()
+                if cache_file is not None:
+                    index.save(cache_file, key)
+            _entry_point_index = index
+        elif cache_file is not None and \
+                cache_file not in _entry_point_index_files:
+            _entry_point_index.save(cache_file, key)
+        if cache_file is not None:
+            _entry_point_index_files.add(cache_file)
+        return _entry_point_index
+
+
+def reset_entry_point_index():
+    """Discard the process-wide index, e.g. after installing a plugin."""
+    global _entry_point_index
+    with _entry_point_index_lock:
+        _entry_point_index = None
+        _entry_point_index_files.clear()
+
+
+def iter_entry_points(group, name=None):
+    """
+    Iterate over the entry points of a group using the process-wide
+    ``EntryPointIndex``. Drop-in replacement of
+    ``pkg_resources.iter_entry_points``.
+
+    :param group: Entry point group.
+    :param name: If given, only the entry points with this name.
+    """
+    return get_entry_point_index().iter_entry_points(group, name=name)
+
+
 class EntryPointRegistry(DictRegistry):
     """
     Entry point registry. Based on ``DictRegistry`` with keys being
@@ -100,39 +405,184 @@ class EntryPointRegistry(DictRegistry):
     :param exclude: A list of names to not register. Useful together
         with initial equals to ``None``. Defaults to ``[]``.
     :param unique: Allow only unique options in entry point group if ``True``.
+    :param cache_file: Path of a file to cache the entry point index in
+        between processes (see ``get_entry_point_index()``). Defaults to
+        ``None``.
+    :param workers: Number of threads used to load the entry points. The
+        values are registered in the order of the entry points regardless of
+        the order in which they finish loading. Defaults to ``None``
+        (load sequentially).
+
+    All instances share a single index of the installed entry points (see
+    ``get_entry_point_index()``), so the distribution metadata is only read
+    once per process.
     """
 
     def __init__(self, entry_point_ns, load=True, initial=None, exclude=None,
-                 unique=False):
+                 unique=False, cache_file=None, workers=None):
         super(EntryPointRegistry, self).__init__()
         self.load = load
         self.initial = initial or [None]
         self.exclude = set(exclude or [])
         self.unique = unique
-        for name in self.initial:
+        if cache_file is not None:
+            get_entry_point_index(cache_file=cache_file)
+        entry_points = [
+            entry_point_group
+            for name in self.initial
             for entry_point_group in iter_entry_points(entry_point_ns,
-                                                       name=name):
-                if entry_point_group.name in self.exclude:
-                    continue
+                                                       name=name)
+            if entry_point_group.name not in self.exclude
+        ]
+        if load and workers and workers > 1 and \
+                ThreadPoolExecutor is not None:
+            self._register_parallel(entry_points, workers)
+        else:
+            for entry_point_group in entry_points:
                 self.register(entry_point_group)
 
-    def register(self, entry_point):  # pylint: disable=W0221
-        """Register a new entry point
+    def _register_parallel(self, entry_points, workers):
+        """
+        Load entry points with a thread pool and register them in order.
 
-        :param entry_point: The entry point
+        Name conflicts of unique registries are detected before loading.
         """
-        value = entry_point.load() if self.load else entry_point
-        is_registered = entry_point.name in self.registry
+        if self.unique:
+            names = set(self.registry)
+            for entry_point in entry_points:
+                if entry_point.name in names:
+                    raise RuntimeError("{0} is already registered".format(
+                        entry_point.name
+                    ))
+                names.add(entry_point.name)
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            values = list(executor.map(self._load_entry_point, entry_points))
+        for entry_point, value in zip(entry_points, values):
+            self._register_value(entry_point.name, value)
+
+    def _load_entry_point(self, entry_point):
+        """Load an entry point unless loading is disabled."""
+        if not self.load:
+            return entry_point
+        with profile_step(entry_point.module_name):
+            return entry_point.load()
+
+    def _register_value(self, name, value):
+        """Register the value of an entry point under its name."""
+        is_registered = name in self.registry
         if self.unique:
             if is_registered:
-                raise RuntimeError("{0} is already registered".format(
-                    entry_point.name
-                ))
-            self.registry[entry_point.name] = value
+                raise RuntimeError("{0} is already registered".format(name))
+            self._index_add(name, value)
+            self.registry[name] = value
+        elif not self._indexes:
+            self.registry.setdefault(name, []).append(value)
         else:
-            if not is_registered:
-                self.registry[entry_point.name] = []
-            self.registry[entry_point.name].append(value)
+            # The indexed list is replaced, so it can be removed from the
+            # indexes with the index keys it was added with.
+            values = list(self.registry.get(name, []))
+            values.append(value)
+            self._index_add(name, values)
+            if is_registered:
+                self._index_remove(name, self.registry[name])
+            self.registry[name] = values
+        self.bump_version()
+
+    def register(self, entry_point):  # pylint: disable=W0221
+        """Register a new entry point
+
+        :param entry_point: The entry point
+        """
+        self._register_value(entry_point.name,
+                             self._load_entry_point(entry_point))
+
+
+def _scandir(path):
+    """List a directory as sorted ``(name, path, is_dir)`` tuples."""
+    if hasattr(os, 'scandir'):
+        entries = [(entry.name, entry.path, entry.is_dir())
+                   for entry in os.scandir(path)]
+    else:
+        entries = [(name, os.path.join(path, name),
+                    os.path.isdir(os.path.join(path, name)))
+                   for name in os.listdir(path)]
+    entries.sort()
+    return entries
+
+
+def _compile_patterns(patterns):
+    """Compile a list of file name globs into a single match function."""
+    if not patterns:
+        return lambda name: True
+    return re.compile('|'.join(
+        '(?:%s)' % translate(os.path.normcase(pattern))
+        for pattern in patterns
+    )).match
+
+
+def _iter_dir(path, recursive, match):
+    """Iterate over the matching entries of a directory."""
+    try:
+        entries = _scandir(path)
+    except OSError:
+        return
+    for name, entry_path, is_dir in entries:
+        if is_dir and recursive:
+            for sub_path in _iter_dir(entry_path, recursive, match):
+                yield sub_path
+        elif match(os.path.normcase(name)):
+            yield entry_path
+
+
+def _package_dir(pkg):
+    """Get the directory of a package."""
+    module = import_string(pkg) if isinstance(pkg, six.string_types) else pkg
+    if getattr(module, '__file__', None):
+        return os.path.dirname(module.__file__)
+    # Namespace packages have no ``__file__``.
+    return list(getattr(module, '__path__', [None]))[0]
+
+
+def _map_file(path):
+    """
+    Memory-map a file read-only and return a ``memoryview`` of it. On
+    Python 2, ``mmap`` does not support ``memoryview``, so a ``buffer`` is
+    returned instead.
+    """
+    view = memoryview if six.PY3 else buffer
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return view(b'')
+        # The mapping stays valid after the file is closed.
+        return view(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+
+def iter_resource_files(packages, resource_dir, recursive=False,
+                        patterns=None):
+    """
+    Iterate over the files in a resource directory of a list of packages.
+
+    Each package directory is resolved once and scanned with a single
+    directory listing. Paths are yielded as they are found, so large
+    resource directories can be processed without building a list.
+
+    :param packages: Iterable of package names or modules.
+    :param resource_dir: Name of the resource directory inside each package.
+    :param recursive: If ``True`` search subdirectories of the resource
+        directory and yield only files. Otherwise all entries of the
+        resource directory are yielded. Defaults to ``False``.
+    :param patterns: List of file name globs (e.g. ``['*.cfg']``). If given,
+        only entries with a matching name are yielded. Defaults to ``None``.
+    """
+    match = _compile_patterns(patterns)
+    for pkg in packages:
+        pkg_dir = _package_dir(pkg)
+        if pkg_dir is None:
+            continue
+        for path in _iter_dir(os.path.join(pkg_dir, resource_dir),
+                              recursive, match):
+            yield path
 
 
 class PkgResourcesDirDiscoveryRegistry(ModuleAutoDiscoveryRegistry):
@@ -142,14 +592,418 @@ class PkgResourcesDirDiscoveryRegistry(ModuleAutoDiscoveryRegistry):
     a specific resource directory and register all files found in the
     directories. By default the list of Python packages is read from the
     ``packages`` registry namespace.
+
+    :param module_name: Name of resource directory to search for in packages.
+    :param app: Flask application object
+    :param registry_namespace: The registry namespace of an
+        ``ImportPathRegistry`` or ``ModuleRegistry`` with a list Python
+        packages to search for resource directories in. Defaults to
+        ``packages``.
+    :param with_setup: Unused, see ``ModuleAutoDiscoveryRegistry``.
+    :param silent: Unused, see ``ModuleAutoDiscoveryRegistry``.
+    :param recursive: Search subdirectories of the resource directories.
+        Defaults to ``False``.
+    :param patterns: List of file name globs to filter the files by.
+        Defaults to ``None`` (all files).
+    :param lazy: if set to True the discovery is deferred until the registry
+        is first accessed (see ``ModuleDiscoveryRegistry``). Defaults to
+        ``False``.
     """
+
+    max_open_mappings = 64
+    """Maximum number of memory-mapped files kept open by
+    ``read_resource()``. Defaults to ``64``."""
+
+    def __init__(self, module_name, app=None, registry_namespace=None,
+                 with_setup=False, silent=False, recursive=False,
+                 patterns=None, lazy=False):
+        self.recursive = recursive
+        self.patterns = patterns
+        self._paths = {}
+        self._mappings = OrderedDict()
+        self._mappings_lock = threading.Lock()
+        super(PkgResourcesDirDiscoveryRegistry, self).__init__(
+            module_name, app=app, registry_namespace=registry_namespace,
+            with_setup=with_setup, silent=silent, lazy=lazy
+        )
+
+    def iter_resources(self, app=None):
+        """
+        Iterate over the resource files without registering them.
+
+        :param app: Flask application object from where the list of Python
+            packages is loaded. Defaults to ``current_app``.
+        """
+        return iter_resource_files(self._iter_packages(app=app),
+                                   self.module_name,
+                                   recursive=self.recursive,
+                                   patterns=self.patterns)
+
+    def read_resource(self, path):
+        """
+        Get the content of a discovered resource file without copying it.
+
+        The file is memory-mapped read-only, so the pages are shared with
+        all processes mapping the same file. Mappings are cached per path and
+        the least recently used ones are released when more than
+        ``max_open_mappings`` files are mapped.
+
+        :param path: Absolute path of a discovered resource file.
+        :returns: A read-only ``memoryview`` of the file content (a
+            ``buffer`` on Python 2).
+        :raise flask_registry.RegistryError: if the file was not discovered
+            by this registry.
+        """
+        self._ensure_discovered()
+        with self._mappings_lock:
+            buf = self._mappings.pop(path, None)
+            if buf is None:
+                if path not in self._paths:
+                    raise RegistryError("Resource %s not found." % path)
+                buf = _map_file(path)
+            self._mappings[path] = buf
+            while len(self._mappings) > self.max_open_mappings:
+                # Do not close the mapping, it may still be in use. It is
+                # released once the last view of it is garbage collected.
+                self._mappings.popitem(last=False)
+        return buf
+
+    def _index_add_many(self, entries):
+        entries = list(entries)
+        super(PkgResourcesDirDiscoveryRegistry, self)._index_add_many(entries)
+        for _, path in entries:
+            self._paths[path] = self._paths.get(path, 0) + 1
+
+    def _index_remove(self, key, path):
+        super(PkgResourcesDirDiscoveryRegistry, self)._index_remove(key, path)
+        count = self._paths.pop(path) - 1
+        if count:
+            self._paths[path] = count
+
+    def unregister(self, path, *args, **kwargs):
+        """
+        Unregister a resource file and release its memory mapping.
+
+        :param path: Absolute path of the resource file.
+        """
+        super(PkgResourcesDirDiscoveryRegistry, self).unregister(
+            path, *args, **kwargs)
+        with self._mappings_lock:
+            self._mappings.pop(path, None)
+
+    def release_resources(self):
+        """Release all memory-mapped files cached by ``read_resource()``."""
+        with self._mappings_lock:
+            self._mappings.clear()
+
     def _discover_module(self, pkg):
         """
         Load list of files from resource directory.
         """
-        if resource_isdir(pkg, self.module_name):
-            for filename in resource_listdir(pkg, self.module_name):
-                self.register(os.path.join(
-                    os.path.dirname(import_string(pkg).__file__),
-                    self.module_name, filename)
-                )
+        for path in iter_resource_files([pkg], self.module_name,
+                                        recursive=self.recursive,
+                                        patterns=self.patterns):
+            self.register(path)
+
+
+class ResourceIndexRegistry(PkgResourcesDirDiscoveryRegistry):
+    """
+    Specialized ``PkgResourcesDirDiscoveryRegistry`` that indexes the found
+    files by their path relative to the resource directory (using ``/`` as
+    separator, e.g. ``'mymodule/index.html'``).
+
+    When several packages provide a resource with the same name, the package
+    listed last in the packages registry overrides the previous ones. The
+    resource directories are searched recursively by default.
+
+    :param module_name: Name of resource directory to search for in packages.
+    :param app: Flask application object
+    :param registry_namespace: The registry namespace with the list of Python
+        packages. Defaults to ``packages``.
+    :param recursive: Search subdirectories of the resource directories.
+        Defaults to ``True``.
+    :param patterns: List of file name globs to filter the files by.
+        Defaults to ``None`` (all files).
+    :param lazy: if set to True the discovery is deferred until the registry
+        is first accessed (see ``ModuleDiscoveryRegistry``). Defaults to
+        ``False``.
+    """
+
+    def __init__(self, module_name, app=None, registry_namespace=None,
+                 with_setup=False, silent=False, recursive=True,
+                 patterns=None, lazy=False):
+        self.index = {}
+        self._names = {}
+        super(ResourceIndexRegistry, self).__init__(
+            module_name, app=app, registry_namespace=registry_namespace,
+            with_setup=with_setup, silent=silent, recursive=recursive,
+            patterns=patterns, lazy=lazy
+        )
+
+    def _discover_module(self, pkg):
+        """
+        Load and index list of files from resource directory.
+        """
+        pkg_dir = _package_dir(pkg)
+        if pkg_dir is None:
+            return
+        resource_dir = os.path.join(pkg_dir, self.module_name)
+        for path in _iter_dir(resource_dir, self.recursive,
+                              _compile_patterns(self.patterns)):
+            name = os.path.relpath(path, resource_dir).replace(os.sep, '/')
+            self.register(path)
+            self._names[path] = name
+            self.index.setdefault(name, []).append(path)
+
+    def unregister(self, path, *args, **kwargs):
+        """
+        Unregister a resource file and remove it from the index.
+
+        :param path: Absolute path of the resource file.
+        """
+        super(ResourceIndexRegistry, self).unregister(path, *args, **kwargs)
+        name = self._names.pop(path, None)
+        if name is not None:
+            self.index[name].remove(path)
+            if not self.index[name]:
+                del self.index[name]
+
+    def lookup(self, name, default=None):
+        """
+        Get the absolute path of the overriding resource with a given name.
+
+        :param name: Resource name relative to the resource directory.
+        :param default: Value returned if no resource is found.
+        """
+        self._ensure_discovered()
+        paths = self.index.get(name)
+        return paths[-1] if paths else default
+
+    def get_override_chain(self, name):
+        """
+        Get all paths of resources with a given name.
+
+        :param name: Resource name relative to the resource directory.
+        :returns: List of absolute paths, the overriding resource first.
+        """
+        self._ensure_discovered()
+        return list(reversed(self.index.get(name, [])))
+
+    def names(self):
+        """Get the sorted names of the indexed resources."""
+        self._ensure_discovered()
+        return sorted(self.index)
+
+
+class ResourceIndexLoader(BaseLoader):
+    """
+    Jinja template loader looking up templates in a ``ResourceIndexRegistry``.
+
+    :param registry: A ``ResourceIndexRegistry`` or a ``RegistryProxy`` to
+        one.
+    :param encoding: Encoding of the template files. Defaults to ``utf-8``.
+    """
+
+    def __init__(self, registry, encoding='utf-8'):
+        self.registry = registry
+        self.encoding = encoding
+
+    def get_source(self, environment, template):
+        """Get the source of a template from the resource index."""
+        path = self.registry.lookup('/'.join(split_template_path(template)))
+        if path is None:
+            raise TemplateNotFound(template)
+
+        with open(path, 'rb') as f:
+            contents = f.read().decode(self.encoding)
+
+        mtime = os.path.getmtime(path)
+
+        def uptodate():
+            try:
+                return os.path.getmtime(path) == mtime
+            except OSError:
+                return False
+
+        return contents, path, uptodate
+
+    def list_templates(self):
+        """List the names of all templates in the resource index."""
+        return self.registry.names()
+
+
+StaticResource = namedtuple(
+    'StaticResource', ['path', 'hash', 'size', 'mtime', 'compressed_path']
+)
+"""Information about a static resource file. ``compressed_path`` is
+``None`` if compressing the file does not make it smaller."""
+
+
+class StaticResourceRegistry(ResourceIndexRegistry):
+    """
+    Specialized ``ResourceIndexRegistry`` that precomputes content hashes
+    and gzip compressed variants of static files during discovery.
+
+    The files are processed in parallel. The results are stored in a
+    manifest in ``cache_dir`` and reused on the next discovery for files
+    whose modification time and size did not change. The manifest is
+    discarded if it was written with another ``hash_name`` or
+    ``compress_min_size``. Compressed variants are stored in ``cache_dir``
+    named by the content hash.
+
+    :param module_name: Name of resource directory to search for in packages.
+    :param app: Flask application object
+    :param registry_namespace: The registry namespace with the list of Python
+        packages. Defaults to ``packages``.
+    :param cache_dir: Directory for the manifest and the compressed files.
+        Defaults to a ``flask-registry`` directory in the application
+        instance folder.
+    :param hash_name: Name of the ``hashlib`` algorithm. Defaults to
+        ``sha1``.
+    :param compress_min_size: Files smaller than this number of bytes are
+        not compressed. Defaults to ``512``.
+    :param workers: Number of threads used to process files. Defaults to
+        ``4``.
+    :param patterns: List of file name globs to filter the files by.
+        Defaults to ``None`` (all files).
+    :param lazy: if set to True the discovery is deferred until the registry
+        is first accessed (see ``ModuleDiscoveryRegistry``). Defaults to
+        ``False``.
+    """
+
+    def __init__(self, module_name, app=None, registry_namespace=None,
+                 with_setup=False, silent=False, cache_dir=None,
+                 hash_name='sha1', compress_min_size=512, workers=4,
+                 patterns=None, lazy=False):
+        self.cache_dir = cache_dir
+        self.hash_name = hash_name
+        self.compress_min_size = compress_min_size
+        self.workers = workers
+        self.resources = {}
+        super(StaticResourceRegistry, self).__init__(
+            module_name, app=app, registry_namespace=registry_namespace,
+            with_setup=with_setup, silent=silent, recursive=True,
+            patterns=patterns, lazy=lazy
+        )
+
+    @property
+    def manifest_path(self):
+        """
+        Path of the manifest file in the cache directory. Registries
+        filtering the files by different patterns use different manifests.
+        """
+        name = '%s-%s' % (self.registry_namespace, self.module_name)
+        if self.patterns:
+            name += '-' + hashlib.sha1(json.dumps(
+                sorted(self.patterns)).encode('utf-8')).hexdigest()[:8]
+        return os.path.join(self.cache_dir, name + '.json')
+
+    @property
+    def manifest_settings(self):
+        """Settings the files in the manifest were processed with."""
+        return {'hash_name': self.hash_name,
+                'compress_min_size': self.compress_min_size}
+
+    def discover(self, app=None):
+        """
+        Perform resource discovery and process the discovered files.
+
+        :param app: Flask application object. Defaults to ``current_app``.
+        """
+        super(StaticResourceRegistry, self).discover(app=app)
+        if self.cache_dir is None:
+            app = app or self.app
+            self.cache_dir = os.path.join(app.instance_path, 'flask-registry')
+        if not os.path.isdir(self.cache_dir):
+            os.makedirs(self.cache_dir)
+
+        manifest = self._read_manifest()
+        paths = [path for path in self.registry if path not in self.resources]
+        if ThreadPoolExecutor is not None and self.workers > 1:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                results = list(executor.map(
+                    lambda path: self._process(path, manifest.get(path)),
+                    paths
+                ))
+        else:
+            results = [self._process(path, manifest.get(path))
+                       for path in paths]
+
+        self.resources.update((info.path, info) for info in results)
+        new_manifest = dict(
+            (path, list(info)) for path, info in self.resources.items()
+        )
+        if new_manifest != manifest:
+            self._write_manifest(new_manifest)
+
+    def _read_manifest(self):
+        """
+        Read the manifest of previously processed files. It is empty if the
+        files were processed with other settings.
+        """
+        try:
+            with open(self.manifest_path) as f:
+                manifest = json.load(f)
+        except (IOError, OSError, ValueError):
+            return {}
+        if not isinstance(manifest, dict) or \
+                manifest.get('settings') != self.manifest_settings:
+            return {}
+        return manifest.get('files', {})
+
+    def _write_manifest(self, manifest):
+        """Atomically write the manifest of processed files."""
+        _write_atomic(self.manifest_path, json.dumps({
+            'settings': self.manifest_settings, 'files': manifest}))
+
+    def _process(self, path, cached):
+        """
+        Compute the hash and compressed variant of a file.
+
+        :param path: Absolute path of the file.
+        :param cached: Manifest entry from a previous run or ``None``.
+        """
+        stat = os.stat(path)
+        if cached is not None:
+            info = StaticResource(*cached)
+            if info.mtime == stat.st_mtime and info.size == stat.st_size \
+                    and (info.compressed_path is None or
+                         os.path.exists(info.compressed_path)):
+                return info
+
+        with open(path, 'rb') as f:
+            data = f.read()
+        digest = hashlib.new(self.hash_name, data).hexdigest()
+
+        compressed_path = None
+        if len(data) >= self.compress_min_size:
+            buf = io.BytesIO()
+            with gzip.GzipFile(fileobj=buf, mode='wb', mtime=0) as gz:
+                gz.write(data)
+            if buf.tell() < len(data):
+                compressed_path = os.path.join(self.cache_dir,
+                                               digest + '.gz')
+                if not os.path.exists(compressed_path):
+                    _write_atomic(compressed_path, buf.getvalue())
+
+        return StaticResource(path, digest, len(data), stat.st_mtime,
+                              compressed_path)
+
+    def unregister(self, path, *args, **kwargs):
+        """
+        Unregister a static file.
+
+        :param path: Absolute path of the static file.
+        """
+        super(StaticResourceRegistry, self).unregister(path, *args, **kwargs)
+        self.resources.pop(path, None)
+
+    def get_resource_info(self, name):
+        """
+        Get the information about the overriding static file with a name.
+
+        :param name: Resource name relative to the resource directory.
+        :returns: A ``StaticResource`` or ``None`` if not found.
+        """
+        path = self.lookup(name)
+        return self.resources.get(path) if path is not None else None
@@ -0,0 +1,348 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of Flask-Registry
+# Copyright (C) 2016 CERN.
+#
+# Flask-Registry is free software; you can redistribute it and/or
+# modify it under the terms of the Revised BSD License; see LICENSE
+# file for more details.
+
+"""
+Read-only registry snapshots shared between processes.
+
+Registries holding plain data (e.g. lists of import paths or merged
+configuration) can be written to a snapshot file by one process. Other
+processes map the file into memory and read the objects directly from the
+mapping, so the data is shared in the page cache instead of being
+duplicated in every worker:
+
+.. doctest::
+
+    >>> import os, tempfile
+    >>> from flask import Flask
+    >>> from flask_registry import DictRegistry, ListRegistry, Registry
+    >>> from flask_registry.snapshot import load_snapshot, write_snapshot
+    >>> r = Registry(app=Flask('myapp'))
+    >>> r['packages'] = ListRegistry()
+    >>> r['packages'].register('mypackage')
+    >>> r['config'] = DictRegistry()
+    >>> r['config'].register('DEBUG', False)
+    >>> path = os.path.join(tempfile.mkdtemp(), 'registry.snapshot')
+    >>> write_snapshot(path, r)
+
+    >>> worker = Registry(app=Flask('myapp'))
+    >>> snapshot = load_snapshot(path, registry=worker)
+    >>> list(worker['packages'])
+    ['mypackage']
+    >>> worker['config']['DEBUG']
+    False
+
+The objects must be encodable as JSON (strings, numbers, booleans, ``None``
+and lists or dictionaries of them), and the keys of dictionary registries
+must be strings. An object is decoded each time it is accessed. Dictionary
+keys are looked up by bisection and iterated in sorted order.
+"""
+
+from __future__ import absolute_import
+
+import json
+import mmap
+import struct
+from collections import OrderedDict
+
+import six
+
+from .registries.core import DictRegistry, ListRegistry
+from .utils import _write_atomic
+
+try:
+    from collections.abc import Mapping, Sequence
+except ImportError:  # Python 2
+    from collections import Mapping, Sequence
+
+_MAGIC = b'FLRSNAP1'
+_HEADER = struct.Struct('<8sI')
+"""Magic bytes and number of namespaces."""
+_NAMESPACE = struct.Struct('<HBQ')
+"""Length of the namespace name (which follows), kind and section offset."""
+_COUNT = struct.Struct('<Q')
+_LIST_ENTRY = struct.Struct('<QQ')
+"""Offset and length of an object."""
+_DICT_ENTRY = struct.Struct('<QIQQ')
+"""Offset and length of a key and of its object."""
+_LIST = 0
+_DICT = 1
+
+
+def _encode(value):
+    return json.dumps(value, separators=(',', ':')).encode('utf-8')
+
+
+def _decode(data):
+    return json.loads(data.decode('utf-8'))
+
+
+def _encode_key(key):
+    if not isinstance(key, six.string_types):
+        raise TypeError('Snapshot keys must be strings, not %r.' % (key, ))
+    return key.encode('utf-8') if isinstance(key, six.text_type) else key
+
+
+def _build_section(kind, entries):
+    """
+    Build the section of a namespace. Offsets are relative to the start of
+    the section.
+
+    :param kind: ``_LIST`` or ``_DICT``.
+    :param entries: Encoded objects, or pairs of encoded keys and objects
+        sorted by key.
+    """
+    entry_struct = _LIST_ENTRY if kind == _LIST else _DICT_ENTRY
+    offset = _COUNT.size + len(entries) * entry_struct.size
+    table = [_COUNT.pack(len(entries))]
+    data = []
+    for entry in entries:
+        if kind == _LIST:
+            table.append(_LIST_ENTRY.pack(offset, len(entry)))
+            data.append(entry)
+            offset += len(entry)
+        else:
+            key, value = entry
+            table.append(_DICT_ENTRY.pack(offset, len(key),
+                                          offset + len(key), len(value)))
+            data.extend(entry)
+            offset += len(key) + len(value)
+    return b''.join(table + data)
+
+
+def write_snapshot(path, registries, namespaces=None):
+    """
+    Write registries to a snapshot file.
+
+    The file is replaced atomically, so processes which are mapping the
+    previous snapshot keep reading it.
+
+    :param path: Path of the snapshot file.
+    :param registries: Mapping of namespaces to registries, e.g. the
+        ``Registry`` of an application. Sequence registries (e.g.
+        ``ListRegistry``) are written as lists and mapping registries (e.g.
+        ``DictRegistry``) as dictionaries.
+    :param namespaces: Namespaces to write. Defaults to all.
+    :raise TypeError: if a registry is neither a sequence nor a mapping, or
+        contains objects which cannot be encoded.
+    """
+    sections = []
+    for namespace in (registries if namespaces is None else namespaces):
+        registry = registries[namespace]
+        if isinstance(registry, Mapping):
+            sections.append((namespace, _DICT, _build_section(_DICT, sorted(
+                (_encode_key(key), _encode(value))
+                for key, value in registry.items()
+            ))))
+        elif isinstance(registry, Sequence):
+            sections.append((namespace, _LIST, _build_section(
+                _LIST, [_encode(value) for value in registry]
+            )))
+        else:
+            raise TypeError('Registry %s cannot be written to a snapshot.'
+                            % namespace)
+
+    names = [namespace.encode('utf-8') for namespace, _, _ in sections]
+    offset = _HEADER.size + sum(_NAMESPACE.size + len(name)
+                                for name in names)
+    parts = [_HEADER.pack(_MAGIC, len(sections))]
+    for name, (_, kind, section) in zip(names, sections):
+        parts.append(_NAMESPACE.pack(len(name), kind, offset))
+        parts.append(name)
+        offset += len(section)
+    parts.extend(section for _, _, section in sections)
+
+    _write_atomic(path, b''.join(parts))
+
+
+class _SnapshotList(Sequence):
+    """Sequence of the objects in a list section of a snapshot."""
+
+    def __init__(self, buf, offset):
+        self._buf = buf
+        self._offset = offset
+        self._len = _COUNT.unpack_from(buf, offset)[0]
+
+    def __len__(self):
+        return self._len
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self[i] for i in range(*idx.indices(self._len))]
+        if idx < 0:
+            idx += self._len
+        if not 0 <= idx < self._len:
+            raise IndexError('snapshot index out of range')
+        start, length = _LIST_ENTRY.unpack_from(
+            self._buf, self._offset + _COUNT.size + idx * _LIST_ENTRY.size)
+        start += self._offset
+        return _decode(self._buf[start:start + length])
+
+
+class _SnapshotDict(Mapping):
+    """Mapping of the objects in a dictionary section of a snapshot."""
+
+    def __init__(self, buf, offset):
+        self._buf = buf
+        self._offset = offset
+        self._len = _COUNT.unpack_from(buf, offset)[0]
+
+    def _entry(self, idx):
+        return _DICT_ENTRY.unpack_from(
+            self._buf, self._offset + _COUNT.size + idx * _DICT_ENTRY.size)
+
+    def _key(self, idx):
+        start, length, _, _ = self._entry(idx)
+        start += self._offset
+        return self._buf[start:start + length]
+
+    def _find(self, key):
+        """Get the index of a key by bisection or ``None``."""
+        try:
+            key = _encode_key(key)
+        except TypeError:
+            return None
+        lo, hi = 0, self._len
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self._len and self._key(lo) == key:
+            return lo
+        return None
+
+    def __len__(self):
+        return self._len
+
+    def __iter__(self):
+        for idx in range(self._len):
+            yield self._key(idx).decode('utf-8')
+
+    def __contains__(self, key):
+        return self._find(key) is not None
+
+    def __getitem__(self, key):
+        idx = self._find(key)
+        if idx is None:
+            raise KeyError(key)
+        _, _, start, length = self._entry(idx)
+        start += self._offset
+        return _decode(self._buf[start:start + length])
+
+
+class _ReadOnlyMixin(object):
+    """Registry which cannot be changed."""
+
+    def register(self, *args, **kwargs):
+        """It is not possible to register objects in a snapshot."""
+        raise NotImplementedError()
+
+    def register_many(self, *args, **kwargs):
+        """It is not possible to register objects in a snapshot."""
+        raise NotImplementedError()
+
+    def unregister(self, *args, **kwargs):
+        """It is not possible to unregister objects from a snapshot."""
+        raise NotImplementedError()
+
+
+class SnapshotListRegistry(_ReadOnlyMixin, ListRegistry):
+    """
+    Read-only ``ListRegistry`` reading its objects from a snapshot.
+
+    :param objects: Sequence of the objects in the snapshot.
+    """
+
+    def __init__(self, objects):
+        super(SnapshotListRegistry, self).__init__()
+        self.registry = objects
+
+
+class SnapshotDictRegistry(_ReadOnlyMixin, DictRegistry):
+    """
+    Read-only ``DictRegistry`` reading its objects from a snapshot.
+
+    :param objects: Mapping of the objects in the snapshot.
+    """
+
+    def __init__(self, objects):
+        super(SnapshotDictRegistry, self).__init__()
+        self.registry = objects
+
+
+class Snapshot(object):
+    """
+    Snapshot file mapped into memory.
+
+    The registries created from the snapshot read from the mapping, so it
+    must not be closed while they are in use.
+
+    :param path: Path of the snapshot file.
+    :raise ValueError: if the file is not a snapshot.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._map) < _HEADER.size or \
+                self._map[:len(_MAGIC)] != _MAGIC:
+            self._map.close()
+            raise ValueError('%s is not a registry snapshot.' % path)
+        count = _HEADER.unpack_from(self._map, 0)[1]
+        self.namespaces = OrderedDict()
+        """Kinds and section offsets of the namespaces in the snapshot."""
+        offset = _HEADER.size
+        for _ in range(count):
+            length, kind, section = _NAMESPACE.unpack_from(self._map, offset)
+            offset += _NAMESPACE.size
+            name = self._map[offset:offset + length].decode('utf-8')
+            offset += length
+            self.namespaces[name] = (kind, section)
+
+    def registry(self, namespace):
+        """
+        Create a read-only registry with the objects of a namespace.
+
+        :param namespace: Namespace in the snapshot.
+        """
+        kind, offset = self.namespaces[namespace]
+        if kind == _LIST:
+            return SnapshotListRegistry(_SnapshotList(self._map, offset))
+        return SnapshotDictRegistry(_SnapshotDict(self._map, offset))
+
+    def install(self, registry):
+        """
+        Swap the registries of all namespaces in the snapshot into an
+        application registry (see ``Registry.swap()``).
+
+        :param registry: The ``Registry`` of the application.
+        """
+        for namespace in self.namespaces:
+            registry.swap(namespace, self.registry(namespace))
+
+    def close(self):
+        """Close the memory mapping."""
+        self._map.close()
+
+
+def load_snapshot(path, registry=None):
+    """
+    Map a snapshot file into memory.
+
+    :param path: Path of the snapshot file.
+    :param registry: The ``Registry`` of an application to install the
+        snapshot registries in. Defaults to ``None``.
+    :returns: The ``Snapshot``.
+    """
+    snapshot = Snapshot(path)
+    if registry is not None:
+        snapshot.install(registry)
+    return snapshot
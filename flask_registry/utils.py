@@ -9,7 +9,158 @@
 
 """Utility functions."""
 
+import os
+import tempfile
+
 from six import iteritems
+from six.moves import intern
+
+
+def _replace(src, dst):
+    """Atomically move a file to its destination."""
+    getattr(os, 'replace', os.rename)(src, dst)
+
+
+def _write_atomic(path, data):
+    """Atomically write text or bytes to a file."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.')
+    with os.fdopen(fd, 'wb' if isinstance(data, bytes) else 'w') as f:
+        f.write(data)
+    _replace(tmp_path, path)
+
+
+def _mtime(path):
+    """Get the modification time of a path or ``None`` if unavailable."""
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return None
+
+
+def _intern(segment):
+    """Intern a native string. ``intern()`` rejects ``unicode`` segments on
+    Python 2, so they are returned unchanged."""
+    return intern(segment) if isinstance(segment, str) else segment
+
+
+class _TrieNode(object):
+    """Node of a ``_DottedTrie``."""
+
+    __slots__ = ('children', 'values', 'size')
+
+    def __init__(self):
+        self.children = {}
+        self.values = []
+        self.size = 0
+        """Number of values in the subtree of the node."""
+
+
+class _DottedTrie(object):
+    """
+    Trie of dotted names (e.g. import paths or namespaces).
+
+    Each node stands for a name segment and holds the values added under the
+    name ending at it. Segments which are native strings are interned, so
+    names sharing segments do not store them twice. Queries take time
+    proportional to the depth of the name and the number of values found.
+    """
+
+    def __init__(self):
+        self._root = _TrieNode()
+
+    def __len__(self):
+        return self._root.size
+
+    def _node(self, name):
+        """Get the node of a name or ``None``."""
+        node = self._root
+        for segment in name.split('.') if name else ():
+            node = node.children.get(segment)
+            if node is None:
+                return None
+        return node
+
+    def add(self, name, value):
+        """Add a value under a name."""
+        node = self._root
+        node.size += 1
+        for segment in name.split('.'):
+            child = node.children.get(segment)
+            if child is None:
+                child = node.children[_intern(segment)] = _TrieNode()
+            child.size += 1
+            node = child
+        node.values.append(value)
+
+    def remove(self, name, value):
+        """
+        Remove the first value equal to a given one from a name and prune
+        the nodes left empty. Raises ``KeyError`` if it is not found.
+        """
+        segments = name.split('.')
+        path = [self._root]
+        for segment in segments:
+            node = path[-1].children.get(segment)
+            if node is None:
+                raise KeyError(name)
+            path.append(node)
+        try:
+            path[-1].values.remove(value)
+        except ValueError:
+            raise KeyError(name)
+        for node in path:
+            node.size -= 1
+        for idx in range(len(segments), 0, -1):
+            if path[idx].size:
+                break
+            del path[idx - 1].children[segments[idx - 1]]
+
+    def get(self, name):
+        """Get the values added under exactly a name."""
+        node = self._node(name)
+        return list(node.values) if node is not None else []
+
+    def has_subtree(self, name):
+        """Check if a value was added under a name or a name below it."""
+        node = self._node(name)
+        return node is not None and node.size > 0
+
+    def iter_subtree(self, name=''):
+        """
+        Iterate the ``(name, value)`` pairs of a name and the names below it,
+        depth first in sorted order.
+        """
+        node = self._node(name)
+        if node is not None:
+            for item in self._walk(name, node):
+                yield item
+
+    def iter_prefix(self, prefix):
+        """
+        Iterate the ``(name, value)`` pairs of the names starting with a
+        string (which does not need to end at a segment boundary).
+        """
+        parent_name, _, partial = prefix.rpartition('.')
+        parent = self._node(parent_name)
+        if parent is None:
+            return
+        for segment in sorted(parent.children):
+            if segment.startswith(partial):
+                name = parent_name + '.' + segment if parent_name else segment
+                for item in self._walk(name, parent.children[segment]):
+                    yield item
+
+    def _walk(self, name, node):
+        stack = [(name, node)]
+        while stack:
+            name, node = stack.pop()
+            for value in node.values:
+                yield name, value
+            prefix = name + '.' if name else ''
+            stack.extend(
+                (prefix + segment, node.children[segment])
+                for segment in sorted(node.children, reverse=True)
+            )
 
 
 def depends(*plugins):
@@ -7,8 +7,11 @@
 # modify it under the terms of the Revised BSD License; see LICENSE
 # file for more details.
 
+import sys
+import threading
 from unittest import TestCase
 
+import six
 from flask import Flask
 
 
@@ -47,3 +50,36 @@ class MockModule(object):
     def assert_not_called(self):
         assert self.called_setup is None
         assert self.called_teardown is None
+
+
+def run_threads(*targets):
+    """Run functions in threads and re-raise their first exception."""
+    errors = []
+
+    def run(target):
+        try:
+            target()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=run, args=(target, ))
+               for target in targets]
+    # Switch threads often so that races show up.
+    if six.PY3:
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+    else:
+        interval = sys.getcheckinterval()
+        sys.setcheckinterval(1)
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        if six.PY3:
+            sys.setswitchinterval(interval)
+        else:
+            sys.setcheckinterval(interval)
+    if errors:
+        raise errors[0]
@@ -9,12 +9,28 @@
 
 from __future__ import absolute_import
 
+import gc
+import os
+import re
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import weakref
+
 import six
+from six.moves import intern
 
-from flask_registry import (DictRegistry, ImportPathRegistry, ListRegistry,
-                            ModuleRegistry, Registry, RegistryError,
-                            SingletonRegistry)
-from helpers import FlaskTestCase, MockModule
+from flask_registry import (CacheRegistry, ConcurrentDictRegistry,
+                            ConcurrentListRegistry, DictRegistry,
+                            ImportPathRegistry, IndexedImportPathRegistry,
+                            ListRegistry, ModuleRegistry,
+                            PriorityListRegistry, Registry, RegistryBase,
+                            RegistryError, SingletonRegistry,
+                            WeakDictRegistry, WeakListRegistry, derived_view)
+from flask_registry.registries.core import compile_exclude
+from helpers import FlaskTestCase, MockModule, run_threads
 
 
 class TestListRegistry(FlaskTestCase):
@@ -34,6 +50,20 @@ class TestListRegistry(FlaskTestCase):
         assert 'item1' in r['myns']
         assert 'item2' not in r['myns']
 
+    def test_register_many(self):
+        registry = ListRegistry()
+        registry.register('item0')
+        version = registry.version
+        registry.register_many('item%d' % i for i in range(1, 4))
+        assert list(registry) == ['item0', 'item1', 'item2', 'item3']
+        assert registry.version > version
+
+        registry.add_index('length', len)
+        self.assertRaises(TypeError, registry.register_many, ['item4', 5])
+        assert len(registry) == 4
+        assert registry.find('length', 5) == ['item0', 'item1', 'item2',
+                                              'item3']
+
 
 class TestDictRegistry(FlaskTestCase):
     def test_registration(self):
@@ -68,6 +98,74 @@ class TestDictRegistry(FlaskTestCase):
         del r['myns']['key1']
         assert len(r['myns']) == 0
 
+    def test_get_or_compute(self):
+        registry = DictRegistry()
+        calls = []
+        results = []
+
+        def factory():
+            calls.append(threading.current_thread())
+            time.sleep(0.05)
+            return object()
+
+        def compute():
+            results.append(registry.get_or_compute('key', factory))
+
+        threads = [threading.Thread(target=compute) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(calls) == 1
+        assert len(results) == 8
+        assert all(result is registry['key'] for result in results)
+        assert registry.get_or_compute('key', lambda: None) is results[0]
+
+    def test_get_or_compute_keys(self):
+        registry = DictRegistry()
+
+        def compute_other():
+            registry.get_or_compute('other', lambda: 'b')
+
+        def factory():
+            # Another key can be computed while this one is in flight.
+            thread = threading.Thread(target=compute_other)
+            thread.start()
+            thread.join(1)
+            return registry['other'] + 'a'
+
+        assert registry.get_or_compute('key', factory) == 'ba'
+
+    def test_get_or_compute_errors(self):
+        registry = DictRegistry()
+        errors = []
+        started = threading.Event()
+
+        def failing():
+            started.set()
+            time.sleep(0.05)
+            raise ValueError('failed')
+
+        def compute():
+            started.wait(1)
+            try:
+                registry.get_or_compute('key', failing)
+            except ValueError as e:
+                errors.append(e)
+
+        thread = threading.Thread(target=compute)
+        thread.start()
+        self.assertRaises(ValueError, registry.get_or_compute, 'key', failing)
+        thread.join()
+        assert len(errors) == 1
+        assert 'key' not in registry
+        assert registry.get_or_compute('key', lambda: 1) == 1
+
+        self.assertRaises(
+            RegistryError, registry.get_or_compute, 'recursive',
+            lambda: registry.get_or_compute('recursive', lambda: 2))
+
     def test_six_usage(self):
         r = Registry(app=self.app)
         r['myns'] = DictRegistry()
@@ -78,6 +176,364 @@ class TestDictRegistry(FlaskTestCase):
         assert list(six.itervalues(r['myns'])) == list(r['myns'].values())
         assert list(six.iteritems(r['myns'])) == list(r['myns'].items())
 
+    def test_register_many(self):
+        registry = DictRegistry()
+        registry.register('key0', 'item0')
+        registry.register_many({'key1': 'item1', 'key2': 'item2'})
+        registry.register_many([('key3', 'item3')])
+        assert dict(registry) == dict(
+            ('key%d' % i, 'item%d' % i) for i in range(4))
+
+        self.assertRaises(RegistryError, registry.register_many,
+                          [('key4', 'item4'), ('key0', 'other')])
+        self.assertRaises(RegistryError, registry.register_many,
+                          [('key4', 'item4'), ('key4', 'other')])
+        assert 'key4' not in registry
+
+
+class TestConcurrentListRegistry(FlaskTestCase):
+    def test_registration(self):
+        r = Registry(app=self.app)
+        r['myns'] = ConcurrentListRegistry()
+        r['myns'].register('a')
+        snapshot = r['myns'].snapshot()
+        r['myns'].register_many(['b', 'c'])
+        r['myns'].unregister('a')
+        assert snapshot == ['a']
+        assert list(r['myns']) == ['b', 'c']
+        assert r['myns'][1] == 'c'
+        self.assertRaises(ValueError, r['myns'].unregister, 'a')
+
+    def test_threads(self):
+        registry = ConcurrentListRegistry()
+        registry.add_index('writer', lambda item: item[0])
+
+        def write(writer):
+            def run():
+                for i in range(200):
+                    registry.register((writer, i))
+                    if i % 2:
+                        registry.unregister((writer, i - 1))
+            return run
+
+        def read():
+            for _ in range(200):
+                items = list(registry)
+                assert len(set(items)) == len(items)
+
+        run_threads(*[write(w) for w in range(4)] + [read] * 4)
+        assert len(registry) == 400
+        assert len(registry.find('writer', 0)) == 100
+
+    def test_threads_indexes(self):
+        registry = ConcurrentListRegistry()
+
+        def slow_number(item):
+            time.sleep(0)
+            return item[1]
+        registry.add_index('writer', lambda item: item[0])
+
+        def write(writer):
+            def run():
+                for i in range(200):
+                    registry.register((writer, i))
+            return run
+
+        def read():
+            for _ in range(200):
+                found = registry.find('writer', 0)
+                assert set(found) <= set(registry.snapshot())
+
+        def add_index():
+            while len(registry) < 100:
+                time.sleep(0)
+            registry.add_index('number', slow_number)
+
+        run_threads(*[write(w) for w in range(4)] + [read] * 4 +
+                     [add_index])
+        assert len(registry.find('writer', 0)) == 200
+        assert len(registry.find('number', 0)) == 4
+
+
+class TestConcurrentDictRegistry(FlaskTestCase):
+    def test_registration(self):
+        r = Registry(app=self.app)
+        r['myns'] = ConcurrentDictRegistry()
+        r['myns'].register('a', 1)
+        snapshot = r['myns'].snapshot()
+        r['myns']['b'] = 2
+        r['myns'].register_many({'c': 3})
+        del r['myns']['a']
+        assert snapshot == {'a': 1}
+        assert dict(r['myns']) == {'b': 2, 'c': 3}
+        self.assertRaises(RegistryError, r['myns'].register_many,
+                          [('d', 4), ('b', 5)])
+        assert 'd' not in r['myns']
+        assert r['myns'].get_or_compute('e', lambda: 5) == 5
+
+    def test_threads(self):
+        registry = ConcurrentDictRegistry()
+
+        def write(writer):
+            def run():
+                for i in range(200):
+                    registry.register((writer, i), i)
+                    if i % 2:
+                        registry.unregister((writer, i - 1))
+            return run
+
+        def read():
+            for _ in range(200):
+                for key, value in registry.snapshot().items():
+                    assert key[1] == value
+
+        run_threads(*[write(w) for w in range(4)] + [read] * 4)
+        assert len(registry) == 400
+
+    def test_threads_indexes(self):
+        registry = ConcurrentDictRegistry()
+
+        def slow_even(value):
+            time.sleep(0)
+            return value % 2 == 0
+
+        def write(writer):
+            def run():
+                for i in range(200):
+                    registry.register((writer, i), i)
+                    if i % 2:
+                        registry.unregister((writer, i - 1))
+            return run
+
+        def add_index():
+            while len(registry) < 100:
+                time.sleep(0)
+            registry.add_index('even', slow_even)
+
+        run_threads(*[write(w) for w in range(4)] + [add_index])
+        assert registry.find('even', True) == []
+        assert len(registry.find('even', False)) == 400
+        registry.remove_index('even')
+        self.assertRaises(RegistryError, registry.find, 'even', True)
+
+
+class TestPriorityListRegistry(FlaskTestCase):
+    def test_registration(self):
+        r = Registry(app=self.app)
+        r['myns'] = PriorityListRegistry()
+        r['myns'].register('c', priority=3)
+        r['myns'].register('a1', priority=1)
+        r['myns'].register('b')
+        r['myns'].register('a2', priority=1)
+        r['myns'].register('z', priority=-1)
+
+        assert list(r['myns']) == ['z', 'b', 'a1', 'a2', 'c']
+        assert r['myns'].priorities == [-1, 0, 1, 1, 3]
+        assert r['myns'][2] == 'a1'
+        assert 'c' in r['myns']
+
+        r['myns'].unregister('a1')
+        assert list(r['myns']) == ['z', 'b', 'a2', 'c']
+        assert r['myns'].priorities == [-1, 0, 1, 3]
+        self.assertRaises(ValueError, r['myns'].unregister, 'a1')
+
+    def test_key(self):
+        registry = PriorityListRegistry(key=len)
+        for item in ('ccc', 'a', 'bb', 'd'):
+            registry.register(item)
+        registry.register('e', priority=5)
+        assert list(registry) == ['a', 'd', 'bb', 'ccc', 'e']
+
+    def test_index(self):
+        registry = PriorityListRegistry()
+        registry.add_index('first', lambda item: item[0])
+        registry.register('b1', priority=2)
+        registry.register('b0', priority=1)
+        assert registry.find('first', 'b') == ['b1', 'b0']
+        registry.unregister('b1')
+        assert registry.find('first', 'b') == ['b0']
+
+    def test_register_many(self):
+        registry = PriorityListRegistry(key=len)
+        registry.register('bb')
+        registry.register('ccc', priority=3)
+        registry.register_many(['a', 'dd', 'eee'])
+        assert list(registry) == ['a', 'bb', 'dd', 'ccc', 'eee']
+        assert registry.priorities == [1, 2, 2, 3, 3]
+
+        registry.register_many(['x', 'y'], priority=0)
+        assert list(registry)[:2] == ['x', 'y']
+
+
+class Obj(object):
+    def __init__(self, name):
+        self.name = name
+
+    def __repr__(self):
+        return self.name
+
+
+class TestWeakListRegistry(FlaskTestCase):
+    def test_registration(self):
+        r = Registry(app=self.app)
+        r['myns'] = WeakListRegistry()
+        a, b, c = Obj('a'), Obj('b'), Obj('c')
+        r['myns'].register(a)
+        r['myns'].register_many([b, c])
+        assert list(r['myns']) == [a, b, c]
+        assert len(r['myns']) == 3
+
+        version = r['myns'].version
+        del b
+        gc.collect()
+        assert r['myns'].version > version
+        assert list(r['myns']) == [a, c]
+        assert len(r['myns']) == 2
+        assert r['myns'][1] is c
+        assert r['myns'][:] == [a, c]
+        assert c in r['myns']
+
+        r['myns'].unregister(a)
+        assert list(r['myns']) == [c]
+        self.assertRaises(ValueError, r['myns'].unregister, a)
+        self.assertRaises(TypeError, r['myns'].register, 'string')
+        self.assertRaises(RegistryError, r['myns'].add_index, 'name',
+                          lambda obj: obj.name)
+
+    def test_iteration(self):
+        registry = WeakListRegistry()
+        objects = [Obj(str(i)) for i in range(4)]
+        registry.register_many(objects)
+        names = []
+        for obj in registry:
+            names.append(obj.name)
+            del objects[:]
+            del obj
+            gc.collect()
+        assert names == ['0']
+        assert len(registry) == 0
+
+    def test_compaction(self):
+        registry = WeakListRegistry()
+        objects = [Obj(str(i)) for i in range(8)]
+        registry.register_many(objects)
+        for i in range(4):
+            del objects[0]
+            gc.collect()
+            assert len(registry) == 7 - i
+            assert objects[0] in registry
+        assert len(registry.registry) == 8
+
+        del objects[0]
+        gc.collect()
+        assert len(registry) == 3
+        assert len(registry.registry) == 3
+        assert not registry._dead
+
+        del objects[0]
+        gc.collect()
+        assert len(registry.registry) == 3
+        assert registry[0] is objects[0]
+        assert len(registry.registry) == 2
+        assert len(registry) == 2
+
+    def test_registry_not_kept_alive(self):
+        registry = WeakListRegistry()
+        obj = Obj('a')
+        registry.register(obj)
+        registry_ref = weakref.ref(registry)
+        del registry
+        gc.collect()
+        assert registry_ref() is None
+        del obj
+
+
+class TestWeakDictRegistry(FlaskTestCase):
+    def test_registration(self):
+        r = Registry(app=self.app)
+        r['myns'] = WeakDictRegistry()
+        a, b = Obj('a'), Obj('b')
+        r['myns'].register('a', a)
+        r['myns']['b'] = b
+        r['myns'].register_many({'c': Obj('c')})
+        gc.collect()
+        assert dict(r['myns']) == {'a': a, 'b': b}
+        assert 'c' not in r['myns']
+        self.assertRaises(KeyError, r['myns'].__getitem__, 'c')
+
+        self.assertRaises(RegistryError, r['myns'].register, 'a', b)
+        del r['myns']['a']
+        assert list(r['myns'].keys()) == ['b']
+        self.assertRaises(RegistryError, r['myns'].add_index, 'name',
+                          lambda obj: obj.name)
+
+    def test_reregistration(self):
+        registry = WeakDictRegistry()
+        a = Obj('a')
+        registry.register('key', a)
+        registry.unregister('key')
+        b = Obj('b')
+        registry.register('key', b)
+        del a
+        gc.collect()
+        assert registry['key'] is b
+        del b
+        gc.collect()
+        assert len(registry) == 0
+
+
+class TestCacheRegistry(FlaskTestCase):
+    def test_lru(self):
+        r = Registry(app=self.app)
+        r['myns'] = CacheRegistry(max_size=3)
+        cache = r['myns']
+        cache.register_many([('a', 1), ('b', 2), ('c', 3)])
+        assert cache['a'] == 1
+        cache['d'] = 4
+        assert sorted(cache) == ['a', 'c', 'd']
+        assert 'b' not in cache
+        assert cache.get('b') is None
+        self.assertRaises(RegistryError, cache.register, 'a', 5)
+        cache.set('a', 5)
+        cache.register('e', 6)
+        assert sorted(cache.items()) == [('a', 5), ('d', 4), ('e', 6)]
+        assert cache.stats() == {
+            'hits': 4, 'misses': 1, 'evictions': 2, 'expirations': 0,
+        }
+        cache.reset_stats()
+        assert cache.stats()['evictions'] == 0
+
+    def test_ttl(self):
+        now = [100.0]
+        cache = CacheRegistry(max_size=None, ttl=10)
+        cache.timer = lambda: now[0]
+        cache.register('a', 1)
+        cache.register('b', 2, ttl=30)
+        cache.register_many({'c': 3})
+        assert cache['a'] == 1
+
+        now[0] = 115.0
+        assert 'a' not in cache
+        self.assertRaises(KeyError, cache.__getitem__, 'c')
+        assert cache['b'] == 2
+        cache.register('a', 4)
+        assert cache['a'] == 4
+
+        now[0] = 200.0
+        assert len(cache) == 2
+        cache.purge_expired()
+        assert len(cache) == 0
+        assert cache.stats() == {
+            'hits': 3, 'misses': 1, 'evictions': 0, 'expirations': 4,
+        }
+
+    def test_index(self):
+        cache = CacheRegistry(max_size=1)
+        cache.add_index('parity', lambda value: value % 2)
+        cache.register('a', 1)
+        cache.register('b', 3)
+        assert cache.find('parity', 1) == [3]
+
 
 class TestSingletonRegistry(FlaskTestCase):
     def test_registration(self):
@@ -115,6 +571,19 @@ class TestImportPathRegistry(FlaskTestCase):
         assert 'flask_registry.registries.core' in \
             self.app.extensions['registry']['impns']
 
+    def test_register_many(self):
+        registry = ImportPathRegistry(exclude=['flask_registry.registries.c*'],
+                                      load_modules=True)
+        registry.register_many(['flask_registry',
+                                'flask_registry.registries.*'])
+        from flask_registry.registries import appdiscovery
+        assert len(registry) == 4
+        assert appdiscovery in registry
+
+        self.assertRaises(ImportError, registry.register_many,
+                          ['flask_registry.metrics', 'not_existing_module'])
+        assert len(registry) == 4
+
     def test_init(self):
         Registry(app=self.app)
         self.app.extensions['registry']['impns'] = ImportPathRegistry(
@@ -145,6 +614,75 @@ class TestImportPathRegistry(FlaskTestCase):
         assert 'flask_registry.registries.pkgresources' not in \
             self.app.extensions['registry']['impns']
 
+    def test_exclude_patterns(self):
+        Registry(app=self.app)
+        self.app.extensions['registry']['impns'] = ImportPathRegistry(
+            initial=['flask_registry.**'],
+            exclude=['flask_registry.*.*discovery',
+                     re.compile(r'.*\.(utils|version)')],
+        )
+        assert 'flask_registry.registries.core' in \
+            self.app.extensions['registry']['impns']
+        assert 'flask_registry.registries.appdiscovery' not in \
+            self.app.extensions['registry']['impns']
+        assert 'flask_registry.registries.modulediscovery' not in \
+            self.app.extensions['registry']['impns']
+        assert 'flask_registry.utils' not in \
+            self.app.extensions['registry']['impns']
+
+    def test_exclude_regex_flags(self):
+        excluded = compile_exclude([re.compile('pkg.views', re.I),
+                                    re.compile('(?i)pkg.models|pkg.a'),
+                                    'pkg.*.tests'])
+        assert excluded('PKG.Views')
+        assert excluded('Pkg.Models')
+        assert excluded('PKG.A')
+        assert excluded('pkg.sub.tests')
+        assert not excluded('PKG.sub.tests')
+        assert not excluded('pkg.views.sub')
+
+        registry = ImportPathRegistry(
+            initial=['flask_registry.registries.*'],
+            exclude=[re.compile('(?i).*CORE')])
+        assert 'flask_registry.registries.core' not in registry
+
+    def test_recursive(self):
+        Registry(app=self.app)
+        self.app.extensions['registry']['impns'] = ImportPathRegistry(
+            initial=['flask_registry.**.core', 'flask_registry.**']
+        )
+        impns = self.app.extensions['registry']['impns']
+        assert impns[0] == 'flask_registry.registries.core'
+        assert impns[1:].index('flask_registry.registries') < \
+            impns[1:].index('flask_registry.registries.core')
+        assert 'flask_registry' not in impns
+
+        self.assertRaises(
+            ValueError, ImportPathRegistry, initial=['flask_registry.base.*']
+        )
+
+    def test_star_cache(self):
+        tmpdir = tempfile.mkdtemp()
+        pkgdir = os.path.join(tmpdir, 'cachedpkg')
+        os.mkdir(pkgdir)
+        for name in ('__init__.py', 'a.py'):
+            open(os.path.join(pkgdir, name), 'w').close()
+        sys.path.insert(0, tmpdir)
+        try:
+            assert list(ImportPathRegistry(initial=['cachedpkg.*'])) == \
+                ['cachedpkg.a']
+
+            open(os.path.join(pkgdir, 'b.py'), 'w').close()
+            mtime = os.stat(pkgdir).st_mtime + 10
+            os.utime(pkgdir, (mtime, mtime))
+
+            assert list(ImportPathRegistry(initial=['cachedpkg.*'])) == \
+                ['cachedpkg.a', 'cachedpkg.b']
+        finally:
+            sys.path.remove(tmpdir)
+            sys.modules.pop('cachedpkg', None)
+            shutil.rmtree(tmpdir)
+
     def test_unregister(self):
         Registry(app=self.app)
         self.app.extensions['registry']['impns'] = ImportPathRegistry(
@@ -158,6 +696,62 @@ class TestImportPathRegistry(FlaskTestCase):
         )
 
 
+class TestIndexedImportPathRegistry(FlaskTestCase):
+    def test_queries(self):
+        r = Registry(app=self.app)
+        r['impns'] = IndexedImportPathRegistry(
+            initial=['flask_registry.registries.*'])
+        r['impns'].register_many(['flask_registry', 'flask_registry.base'])
+        r['impns'].register('flask_registry.registries.core')
+        r['impns'].register('flask_registryx')
+
+        assert 'flask_registry.registries.core' in r['impns']
+        assert 'flask_registry.registries' not in r['impns']
+        assert 'flask_registry.registries.cor' not in r['impns']
+        assert None not in r['impns']
+
+        assert r['impns'].subtree('flask_registry.registries') == [
+            'flask_registry.registries.appdiscovery',
+            'flask_registry.registries.core',
+            'flask_registry.registries.core',
+            'flask_registry.registries.modulediscovery',
+            'flask_registry.registries.pkgresources',
+        ]
+        assert r['impns'].subtree('flask_registry.base') == \
+            ['flask_registry.base']
+        assert r['impns'].subtree('flask_registry.missing') == []
+        assert len(r['impns'].subtree('flask_registry')) == 7
+        assert r['impns'].prefixed('flask_registry.registries.') == \
+            r['impns'].subtree('flask_registry.registries')
+        assert r['impns'].prefixed('flask_reg') == \
+            r['impns'].subtree('flask_registry') + ['flask_registryx']
+        assert r['impns'].prefixed('flask_registry.registries.m') == \
+            ['flask_registry.registries.modulediscovery']
+        assert r['impns'].prefixed('other.') == []
+        assert len(r['impns']) == 8
+
+    def test_load_modules(self):
+        from flask_registry.registries import core
+        registry = IndexedImportPathRegistry(
+            initial=['flask_registry.registries.*'], load_modules=True)
+        assert core in registry
+        assert registry.subtree('flask_registry.registries.core') == [core]
+
+    def test_interned_segments(self):
+        registry = IndexedImportPathRegistry()
+        registry.register(''.join(['pk', 'g.mod']))
+        assert next(iter(registry._trie._root.children)) is intern('pkg')
+
+    def test_unicode_import_paths(self):
+        registry = IndexedImportPathRegistry()
+        registry.register(six.text_type('pkg.mod'))
+        registry.register(str('pkg.other'))
+        assert registry.subtree(six.text_type('pkg')) == \
+            ['pkg.mod', 'pkg.other']
+        assert registry.prefixed(str('pkg.m')) == ['pkg.mod']
+        assert six.text_type('pkg.other') in registry
+
+
 class TestModuleRegistry(FlaskTestCase):
     def test_creation(self):
         Registry(app=self.app)
@@ -169,6 +763,13 @@ class TestModuleRegistry(FlaskTestCase):
         self.app.extensions['registry']['modns'].unregister(moda)
         moda.assert_called()
 
+    def test_register_many(self):
+        registry = ModuleRegistry()
+        moda, modb = MockModule(), MockModule()
+        registry.register_many([moda, modb])
+        assert list(registry) == [moda, modb]
+        assert moda.called_setup and modb.called_setup
+
     def test_creation_setup(self):
         Registry(app=self.app)
         self.app.extensions['registry']['modns'] = ModuleRegistry(
@@ -180,3 +781,154 @@ class TestModuleRegistry(FlaskTestCase):
         self.app.extensions['registry']['modns'].register(moda)
         self.app.extensions['registry']['modns'].unregister(moda)
         moda.assert_not_called()
+
+
+class TestRegistryVersion(FlaskTestCase):
+    def test_version(self):
+        r = Registry(app=self.app)
+        r['listns'] = ListRegistry()
+        r['dictns'] = DictRegistry()
+        r['singletonns'] = SingletonRegistry()
+        assert r['listns'].version == 0
+        assert RegistryBase().version == 0
+
+        versions = [r['listns'].version]
+        r['listns'].register('item')
+        versions.append(r['listns'].version)
+        r['listns'].unregister('item')
+        versions.append(r['listns'].version)
+        assert versions == sorted(set(versions))
+
+        version = r['dictns'].version
+        r['dictns'].register('key', 'item')
+        assert r['dictns'].version > version
+        version = r['dictns'].version
+        del r['dictns']['key']
+        assert r['dictns'].version > version
+
+        version = r['singletonns'].version
+        r['singletonns'].register('item')
+        assert r['singletonns'].version > version
+        version = r['singletonns'].version
+        r['singletonns'].unregister()
+        assert r['singletonns'].version > version
+
+        version = r['listns'].version
+        list(r['listns'])
+        assert r['listns'].version == version
+
+    def test_derived_view(self):
+        calls = []
+
+        @derived_view
+        def sorted_items(registry, reverse=False):
+            calls.append(reverse)
+            return sorted(registry, reverse=reverse)
+
+        registry = ImportPathRegistry(initial=['flask_registry'])
+        registry.register('abc')
+        assert sorted_items(registry) == ['abc', 'flask_registry']
+        assert sorted_items(registry) == ['abc', 'flask_registry']
+        assert sorted_items(registry, reverse=True) == \
+            ['flask_registry', 'abc']
+        assert calls == [False, True]
+
+        registry.register('xyz')
+        assert sorted_items(registry) == ['abc', 'flask_registry', 'xyz']
+        assert calls == [False, True, False]
+
+        other = ListRegistry()
+        assert sorted_items(other) == []
+        assert calls == [False, True, False, False]
+
+    def test_derived_view_method(self):
+        class NamedRegistry(DictRegistry):
+            calls = 0
+
+            @derived_view
+            def by_value(self):
+                self.calls += 1
+                return dict((v, k) for k, v in self.items())
+
+        registry = NamedRegistry()
+        registry['a'] = 1
+        assert registry.by_value() == {1: 'a'}
+        assert registry.by_value() == {1: 'a'}
+        assert registry.calls == 1
+        del registry['a']
+        assert registry.by_value() == {}
+        assert registry.calls == 2
+
+
+class TestSecondaryIndex(FlaskTestCase):
+    def test_list_registry(self):
+        registry = ListRegistry()
+        registry.register('a')
+        registry.register('bb')
+        registry.add_index('length', len)
+        registry.add_index('letters', lambda item: item, multi=True)
+        registry.register('ab')
+        registry.register('bb')
+
+        assert registry.find('length', 2) == ['bb', 'ab', 'bb']
+        assert registry.find('length', 3) == []
+        assert registry.find('letters', 'a') == ['a', 'ab']
+        assert sorted(registry.index_keys('length')) == [1, 2]
+
+        registry.unregister('bb')
+        assert registry.find('length', 2) == ['ab', 'bb']
+        registry.unregister('a')
+        assert registry.find('letters', 'a') == ['ab']
+        assert sorted(registry.index_keys('length')) == [2]
+
+        self.assertRaises(RegistryError, registry.add_index, 'length', len)
+        registry.remove_index('length')
+        self.assertRaises(RegistryError, registry.find, 'length', 2)
+
+    def test_dict_registry(self):
+        registry = DictRegistry()
+        registry.add_index('prefix', lambda value: value.split('/')[1])
+        registry['a'] = '/admin/a'
+        registry['b'] = '/admin/b'
+        registry['c'] = '/public/c'
+
+        assert sorted(registry.find('prefix', 'admin')) == \
+            ['/admin/a', '/admin/b']
+        del registry['a']
+        assert registry.find('prefix', 'admin') == ['/admin/b']
+
+    def test_failing_key(self):
+        registry = ListRegistry()
+        registry.add_index('length', len)
+        self.assertRaises(TypeError, registry.register, 1)
+        assert len(registry) == 0
+        assert registry.index_keys('length') == []
+
+    def test_changed_keys(self):
+        a, b = Obj('a'), Obj('b')
+        registry = ListRegistry()
+        registry.add_index('name', lambda obj: obj.name)
+        registry.register_many([a, b])
+        a.name = 'c'
+        registry.unregister(a)
+        assert list(registry) == [b]
+        assert registry.find('name', 'a') == []
+        assert registry.index_keys('name') == ['b']
+
+        registry = DictRegistry()
+        registry.add_index('name', lambda obj: obj.name)
+        registry['a'] = a
+        a.name = 'd'
+        del registry['a']
+        assert registry.index_keys('name') == []
+
+    def test_equal_objects(self):
+        registry = ListRegistry()
+        registry.add_index('first', lambda item: item[0])
+        first, second = ['a'], ['a']
+        registry.register(first)
+        registry.register(second)
+        first.append('b')
+        registry.unregister(['a', 'b'])
+        assert registry.find('first', 'a') == [second]
+        assert registry.find('first', 'a')[0] is second
@@ -9,12 +9,17 @@
 
 from __future__ import absolute_import
 
+import subprocess
 import sys
+import threading
 
 import six
 
-from flask_registry import Registry, RegistryBase, RegistryError, RegistryProxy
-from helpers import FlaskTestCase
+from flask import current_app
+
+from flask_registry import (ListRegistry, Registry, RegistryBase,
+                            RegistryError, RegistryProxy)
+from helpers import FlaskTestCase, run_threads
 
 
 class TestRegistry(FlaskTestCase):
@@ -27,6 +32,27 @@ class TestRegistry(FlaskTestCase):
         from distutils.version import LooseVersion
         LooseVersion(__version__)
 
+    def test_lazy_import(self):
+        # Run in a new interpreter to get a clean ``sys.modules``. Python <
+        # 3.5 imports the exports eagerly.
+        code = (
+            "import sys\n"
+            "import flask_registry\n"
+            "lazy = sys.version_info >= (3, 5)\n"
+            "assert not lazy or 'pkg_resources' not in sys.modules\n"
+            "from flask_registry import Registry, ListRegistry\n"
+            "assert not lazy or 'pkg_resources' not in sys.modules\n"
+            "from flask_registry import EntryPointRegistry\n"
+            "assert 'pkg_resources' in sys.modules\n"
+            "assert flask_registry.EntryPointRegistry is EntryPointRegistry\n"
+            "from flask_registry import *\n"
+            "assert set(flask_registry.__all__) <= set(dir(flask_registry))\n"
+        )
+        subprocess.check_call([sys.executable, '-c', code])
+
+        import flask_registry
+        self.assertRaises(AttributeError, getattr, flask_registry, 'Missing')
+
     def test_creation(self):
         assert 'registry' not in self.app.extensions
         Registry(app=self.app)
@@ -111,6 +137,123 @@ class TestRegistry(FlaskTestCase):
             self.app.extensions['registry']['myns'].unregister
         )
 
+    def test_swap(self):
+        r = Registry(app=self.app)
+        r.enable_metrics()
+        old = r['myns'] = ListRegistry()
+        new = ListRegistry()
+        new.register('item')
+        proxy = RegistryProxy('myns', ListRegistry)
+
+        assert r.swap('myns', new) is old
+        assert r['myns'] is new
+        assert new.namespace == 'myns'
+        assert new._metrics is r.metrics
+        assert old.namespace is None
+        assert old._metrics is None
+        with self.app.app_context():
+            assert list(proxy) == ['item']
+
+        self.assertRaises(RegistryError, r.swap, 'otherns', new)
+        assert r.swap('otherns', ListRegistry()) is None
+
+    def test_rebuild(self):
+        r = Registry(app=self.app)
+        r['myns'] = ListRegistry()
+        r['myns'].register('old')
+        building = threading.Event()
+        release = threading.Event()
+
+        def factory():
+            assert current_app._get_current_object() is self.app
+            registry = ListRegistry()
+            registry.register('new')
+            building.set()
+            release.wait(5)
+            return registry
+
+        future = r.rebuild('myns', factory, background=True)
+        building.wait(5)
+        assert list(r['myns']) == ['old']
+        release.set()
+        assert list(future.result(5)) == ['old']
+        assert list(r['myns']) == ['new']
+
+        def failing():
+            raise ValueError()
+
+        self.assertRaises(ValueError, r.rebuild, 'myns', failing)
+        assert list(r['myns']) == ['new']
+        future = r.rebuild('myns', failing, background=True)
+        assert isinstance(future.exception(5), ValueError)
+        self.assertRaises(ValueError, future.result)
+        assert list(r['myns']) == ['new']
+        assert list(r.rebuild('myns', ListRegistry)) == ['new']
+        assert list(r['myns']) == []
+
+    def test_swap_threads(self):
+        for _ in range(10):
+            r = Registry()
+
+            def swap():
+                for _ in range(2000):
+                    r.swap('records.views', ListRegistry())
+
+            def delete():
+                for _ in range(2000):
+                    try:
+                        del r['records.views']
+                    except KeyError:
+                        pass
+
+            run_threads(swap, delete, swap, delete)
+            assert r.list_namespaces('records') == \
+                (['records.views'] if 'records.views' in r else [])
+
+    def test_namespaces(self):
+        r = Registry(app=self.app)
+        for key in ('records', 'records.views', 'records.schemas.json',
+                    'recordsx', 'search.views'):
+            r[key] = ListRegistry()
+        r.swap('records.schemas', ListRegistry())
+        r.swap('records.views', ListRegistry())
+        r[('tuple', 'key')] = ListRegistry()
+
+        assert r.list_namespaces('records') == [
+            'records', 'records.schemas', 'records.schemas.json',
+            'records.views',
+        ]
+        assert r.list_namespaces('records.schemas.json') == \
+            ['records.schemas.json']
+        assert r.list_namespaces('rec') == []
+        assert r.list_namespaces('search') == ['search.views']
+        assert r.has_namespaces('search')
+        assert not r.has_namespaces('search.views.other')
+
+        assert r.remove_namespaces('records.schemas') == \
+            ['records.schemas', 'records.schemas.json']
+        assert 'records.schemas.json' not in r
+        assert r.list_namespaces('records') == ['records', 'records.views']
+
+        del r['search.views']
+        assert not r.has_namespaces('search')
+        assert r.remove_namespaces('search') == []
+        assert sorted(r.list_namespaces('')) == [
+            'records', 'records.views', 'recordsx',
+        ]
+        assert ('tuple', 'key') in r
+
+    def test_namespace_string_types(self):
+        r = Registry(app=self.app)
+        r[str('native.views')] = ListRegistry()
+        r[six.text_type('text.views')] = ListRegistry()
+        r.swap(six.text_type('text.schemas'), ListRegistry())
+        assert r.list_namespaces(six.text_type('native')) == ['native.views']
+        assert r.list_namespaces(str('text')) == \
+            ['text.schemas', 'text.views']
+        assert r.remove_namespaces(str('text')) == \
+            ['text.schemas', 'text.views']
+
 
 class TestRegistryProxy(FlaskTestCase):
     def test_proxy(self):
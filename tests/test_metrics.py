@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of Flask-Registry
+# Copyright (C) 2016 CERN.
+#
+# Flask-Registry is free software; you can redistribute it and/or
+# modify it under the terms of the Revised BSD License; see LICENSE
+# file for more details.
+
+from __future__ import absolute_import
+
+from flask_registry import (DictRegistry, EntryPointRegistry, ListRegistry,
+                            Registry, RegistryProxy)
+from flask_registry.metrics import RegistryMetrics, metrics_view
+from helpers import FlaskTestCase
+
+
+class TestRegistryMetrics(FlaskTestCase):
+    def test_disabled(self):
+        r = Registry(app=self.app)
+        r['myns'] = ListRegistry()
+        r['myns'].register('item')
+        assert 'item' in r['myns']
+        assert r.metrics is None
+        assert r['myns']._metrics is None
+
+    def test_list_registry(self):
+        r = Registry(app=self.app)
+        r['myns'] = ListRegistry()
+        r['myns'].register('item')
+        r.enable_metrics()
+        myns = r['myns']
+
+        assert 'item' in myns
+        assert 'other' not in myns
+        assert myns[0] == 'item'
+        self.assertRaises(IndexError, myns.__getitem__, 1)
+        assert list(myns) == ['item']
+
+        assert r.metrics.snapshot() == {'myns': {
+            'accesses': 1, 'lookups': 4, 'iterations': 1, 'misses': 2,
+            'namespace_misses': 0,
+        }}
+
+    def test_dict_registry(self):
+        r = Registry(app=self.app)
+        r.enable_metrics()
+        r['myns'] = DictRegistry()
+        myns = r['myns']
+        myns.register('key', 'value')
+
+        assert myns['key'] == 'value'
+        assert myns.get('other') is None
+        assert 'key' in myns
+        assert list(myns) == ['key']
+        assert 'myns' in r
+        assert 'otherns' not in r
+        self.assertRaises(KeyError, r.__getitem__, 'otherns')
+
+        snapshot = r.metrics.snapshot()
+        assert snapshot['myns'] == {
+            'accesses': 1, 'lookups': 3, 'iterations': 1, 'misses': 1,
+            'namespace_misses': 0,
+        }
+        assert snapshot['otherns'] == {
+            'accesses': 0, 'lookups': 0, 'iterations': 0, 'misses': 0,
+            'namespace_misses': 1,
+        }
+
+        r.disable_metrics()
+        assert myns['key'] == 'value'
+        assert r.metrics is None
+        assert myns._metrics is None
+
+    def test_entry_point_registry(self):
+        r = Registry(app=self.app)
+        r.enable_metrics()
+        r['myns'] = EntryPointRegistry('flask_registry.test_entry',
+                                       load=False)
+        assert 'testcase' in r['myns']
+        assert r.metrics.snapshot()['myns']['lookups'] == 1
+
+    def test_proxy(self):
+        r = Registry(app=self.app)
+        r.enable_metrics()
+        proxy = RegistryProxy('myns', ListRegistry)
+        with self.app.app_context():
+            proxy.register('item')
+        assert r.metrics.snapshot() == {'myns': {
+            'accesses': 1, 'lookups': 0, 'iterations': 0, 'misses': 0,
+            'namespace_misses': 0,
+        }}
+
+    def test_removed_namespace(self):
+        r = Registry(app=self.app)
+        r.enable_metrics()
+        myns = ListRegistry()
+        r['myns'] = myns
+        del r['myns']
+        list(myns)
+        assert myns._metrics is None
+        assert r.metrics.snapshot() == {}
+
+    def test_prometheus(self):
+        metrics = RegistryMetrics()
+        metrics.count('my"ns', 'lookups')
+        text = metrics.to_prometheus()
+        assert '# TYPE flask_registry_lookups_total counter\n' in text
+        assert 'flask_registry_lookups_total{namespace="my\\"ns"} 1\n' in text
+        assert 'flask_registry_misses_total{namespace="my\\"ns"} 0\n' in text
+
+        metrics.reset()
+        assert metrics.snapshot() == {}
+
+    def test_view(self):
+        r = Registry(app=self.app)
+        r['myns'] = ListRegistry()
+        self.app.add_url_rule('/metrics', view_func=metrics_view)
+        client = self.app.test_client()
+
+        assert client.get('/metrics').status_code == 404
+
+        r.enable_metrics()
+        list(r['myns'])
+        response = client.get('/metrics')
+        assert response.status_code == 200
+        assert b'flask_registry_iterations_total{namespace="myns"} 1' in \
+            response.data
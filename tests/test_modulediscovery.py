@@ -9,10 +9,14 @@
 
 from __future__ import absolute_import
 
+import threading
+
+from mock import patch
+
 from flask_registry import (ImportPathRegistry, ModuleAutoDiscoveryRegistry,
                             ModuleDiscoveryRegistry, ModuleRegistry, Registry,
                             RegistryError, RegistryProxy)
-from helpers import FlaskTestCase
+from helpers import FlaskTestCase, MockModule
 
 
 class TestModuleDiscoveryRegistry(FlaskTestCase):
@@ -23,7 +27,7 @@ class TestModuleDiscoveryRegistry(FlaskTestCase):
             pathns=ImportPathRegistry(initial=['flask_registry.*'])
         )
 
-        self.assertEquals(4, len(self.app.extensions['registry']['pathns']))
+        self.assertEquals(7, len(self.app.extensions['registry']['pathns']))
 
         self.app.extensions['registry']['myns'] = \
             ModuleDiscoveryRegistry(
@@ -152,7 +156,7 @@ class TestModuleDiscoveryRegistry(FlaskTestCase):
                                         registry_namespace=proxy)
 
             assert 'pathns' in self.app.extensions['registry']
-            self.assertEqual(4, len(self.app.extensions['registry']['pathns']))
+            self.assertEqual(7, len(self.app.extensions['registry']['pathns']))
 
             self.app.extensions['registry']['myns'].discover()
 
@@ -160,6 +164,158 @@ class TestModuleDiscoveryRegistry(FlaskTestCase):
             from flask_registry.registries import appdiscovery
             assert self.app.extensions['registry']['myns'][0] == appdiscovery
 
+    def test_lazy(self):
+        Registry(app=self.app)
+
+        self.app.extensions['registry'].update(
+            pathns=ImportPathRegistry(initial=['flask_registry.*']),
+            myns=ModuleDiscoveryRegistry('appdiscovery',
+                                         registry_namespace='pathns',
+                                         lazy=True))
+        myns = self.app.extensions['registry']['myns']
+
+        with patch.object(ModuleDiscoveryRegistry, '_discover_module',
+                          wraps=myns._discover_module) as discover_module:
+            with self.app.app_context():
+                from flask_registry.registries import appdiscovery
+                assert appdiscovery in myns
+                assert len(myns) == 1
+                assert myns[0] == appdiscovery
+                assert list(myns) == [appdiscovery]
+            assert discover_module.call_count == 7
+
+    def test_lazy_noapp(self):
+        Registry(app=self.app)
+
+        self.app.extensions['registry'].update(
+            pathns=ImportPathRegistry(initial=['flask_registry.*']),
+            myns=ModuleDiscoveryRegistry('appdiscovery',
+                                         registry_namespace='pathns',
+                                         lazy=True))
+        myns = self.app.extensions['registry']['myns']
+
+        self.assertRaises(RegistryError, len, myns)
+        with self.app.app_context():
+            assert len(myns) == 1
+
+    def test_lazy_threads(self):
+        Registry(app=self.app)
+
+        self.app.extensions['registry'].update(
+            pathns=ImportPathRegistry(initial=['flask_registry.*']),
+            myns=ModuleDiscoveryRegistry('appdiscovery',
+                                         registry_namespace='pathns',
+                                         lazy=True))
+        myns = self.app.extensions['registry']['myns']
+        lengths = []
+
+        def access():
+            with self.app.app_context():
+                lengths.append(len(myns))
+
+        with patch.object(ModuleDiscoveryRegistry, '_discover_module',
+                          wraps=myns._discover_module) as discover_module:
+            threads = [threading.Thread(target=access) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            assert discover_module.call_count == 7
+        assert lengths == [1] * 8
+
+    def test_lazy_threads_wait(self):
+        Registry(app=self.app)
+
+        self.app.extensions['registry'].update(
+            pathns=ImportPathRegistry(initial=['pkg1', 'pkg2']),
+            myns=ModuleDiscoveryRegistry('views', registry_namespace='pathns',
+                                         lazy=True))
+        myns = self.app.extensions['registry']['myns']
+        started = threading.Event()
+        release = threading.Event()
+        lengths = []
+
+        def discover_module(pkg):
+            if pkg == 'pkg2':
+                started.set()
+                release.wait()
+            # The discovering thread sees the modules discovered so far.
+            myns.register(pkg)
+            lengths.append(('discovering', len(myns)))
+
+        def access():
+            with self.app.app_context():
+                lengths.append(len(myns))
+
+        with patch.object(myns, '_discover_module', discover_module):
+            discovering = threading.Thread(target=access)
+            discovering.start()
+            assert started.wait(5)
+            waiting = threading.Thread(target=access)
+            waiting.start()
+            waiting.join(0.1)
+            try:
+                assert waiting.is_alive()
+            finally:
+                release.set()
+                discovering.join()
+                waiting.join()
+        assert lengths == [('discovering', 1), ('discovering', 2), 2, 2]
+
+    def test_lazy_retry(self):
+        Registry(app=self.app)
+
+        self.app.extensions['registry'].update(
+            pathns=ImportPathRegistry(initial=['pkg1', 'pkg2']),
+            myns=ModuleDiscoveryRegistry('views', registry_namespace='pathns',
+                                         lazy=True))
+        myns = self.app.extensions['registry']['myns']
+        myns.add_index('name', lambda module: module)
+        failures = ['pkg2']
+
+        def discover_module(pkg):
+            myns.register(pkg)
+            if pkg in failures:
+                failures.remove(pkg)
+                raise ImportError(pkg)
+
+        with patch.object(myns, '_discover_module', discover_module):
+            with self.app.app_context():
+                self.assertRaises(ImportError, len, myns)
+                assert myns.find('name', 'pkg1') == []
+                assert list(myns) == ['pkg1', 'pkg2']
+                assert myns.find('name', 'pkg1') == ['pkg1']
+                assert not myns._discovery_pending
+
+    def test_lazy_retry_teardown(self):
+        Registry(app=self.app)
+
+        self.app.extensions['registry'].update(
+            pathns=ImportPathRegistry(initial=['pkg1', 'pkg2']),
+            myns=ModuleDiscoveryRegistry('views', registry_namespace='pathns',
+                                         with_setup=True, lazy=True))
+        myns = self.app.extensions['registry']['myns']
+        modules = {'pkg1': MockModule(), 'pkg2': MockModule()}
+        failures = ['pkg2']
+
+        def discover_module(pkg):
+            myns.register(modules[pkg])
+            if pkg in failures:
+                failures.remove(pkg)
+                raise ImportError(pkg)
+
+        with patch.object(myns, '_discover_module', discover_module):
+            with self.app.app_context():
+                self.assertRaises(ImportError, len, myns)
+                modules['pkg1'].assert_called()
+                modules['pkg2'].assert_called()
+                for module in modules.values():
+                    module.called_setup = module.called_teardown = None
+                assert list(myns) == [modules['pkg1'], modules['pkg2']]
+        for module in modules.values():
+            assert module.called_setup is True
+            assert module.called_teardown is None
+
 
 class TestModuleAutoDiscoveryRegistry(FlaskTestCase):
     def test_registration(self):
@@ -168,7 +324,7 @@ class TestModuleAutoDiscoveryRegistry(FlaskTestCase):
         self.app.extensions['registry']['pathns'] = \
             ImportPathRegistry(initial=['flask_registry.*'])
 
-        self.assertEqual(4, len(self.app.extensions['registry']['pathns']))
+        self.assertEqual(7, len(self.app.extensions['registry']['pathns']))
 
         self.app.extensions['registry']['myns'] = \
             ModuleAutoDiscoveryRegistry('appdiscovery',
@@ -191,7 +347,22 @@ class TestModuleAutoDiscoveryRegistry(FlaskTestCase):
         )
 
         with self.app.app_context():
-            self.assertEqual(4, len(self.app.extensions['registry']['pathns']))
+            self.assertEqual(7, len(self.app.extensions['registry']['pathns']))
             self.assertEqual(1, len(list(myns)))
             from flask_registry.registries import appdiscovery
             self.assertEqual(appdiscovery, myns[0])
+
+    def test_lazy(self):
+        Registry(app=self.app)
+
+        self.app.extensions['registry']['pathns'] = \
+            ImportPathRegistry(initial=['flask_registry.*'])
+
+        myns = ModuleAutoDiscoveryRegistry('appdiscovery', app=self.app,
+                                           registry_namespace='pathns',
+                                           lazy=True)
+        assert myns._discovery_pending
+
+        from flask_registry.registries import appdiscovery
+        assert myns[0] == appdiscovery
+        assert not myns._discovery_pending
@@ -9,13 +9,29 @@
 
 from __future__ import absolute_import
 
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
 import pytest
+import six
+from jinja2 import Environment, TemplateNotFound
 from mock import patch
 from pkg_resources import EntryPoint
 
 from flask_registry import (EntryPointRegistry, ImportPathRegistry,
                             PkgResourcesDirDiscoveryRegistry, Registry,
-                            RegistryBase, RegistryProxy)
+                            RegistryBase, RegistryError, RegistryProxy,
+                            ResourceIndexRegistry, StaticResourceRegistry)
+from flask_registry.registries.pkgresources import (
+    EntryPointIndex, ResourceIndexLoader, distribution_metadata_key,
+    get_entry_point_index, iter_resource_files, reset_entry_point_index)
 from helpers import FlaskTestCase
 
 
@@ -42,6 +58,20 @@ def _mock_entry_points(_, name):
             yield entry_point
 
 
+class SlowEntryPoint(EntryPoint):
+    threads = set()
+
+    def load(self):
+        SlowEntryPoint.threads.add(threading.current_thread().ident)
+        time.sleep(0.05 - 0.01 * int(self.module_name))
+        return self.module_name
+
+
+def _slow_entry_points(_, name):
+    for idx, ep_name in enumerate(['a', 'b', 'a', 'c', 'a']):
+        yield SlowEntryPoint(ep_name, str(idx))
+
+
 class TestPkgResourcesDiscoveryRegistry(FlaskTestCase):
 
     def test_registration(self):
@@ -68,6 +98,277 @@ class TestPkgResourcesDiscoveryRegistry(FlaskTestCase):
 
         self.assertEquals(0, len(self.app.extensions['registry']['myns']))
 
+    def test_patterns(self):
+        Registry(app=self.app)
+
+        self.app.extensions['registry'].update(
+            pathns=ImportPathRegistry(initial=['registry_module']))
+        self.app.extensions['registry'].update(
+            cfgns=PkgResourcesDirDiscoveryRegistry('resources',
+                                                   app=self.app,
+                                                   registry_namespace='pathns',
+                                                   patterns=['*.cfg']),
+            txtns=PkgResourcesDirDiscoveryRegistry('resources',
+                                                   app=self.app,
+                                                   registry_namespace='pathns',
+                                                   patterns=['*.txt']))
+
+        self.assertEqual(1, len(self.app.extensions['registry']['cfgns']))
+        self.assertEqual(0, len(self.app.extensions['registry']['txtns']))
+
+        with self.app.app_context():
+            self.assertEqual(
+                list(self.app.extensions['registry']['cfgns']),
+                list(self.app.extensions['registry']['cfgns'].iter_resources())
+            )
+
+
+class TestIterResourceFiles(FlaskTestCase):
+
+    def setUp(self):
+        super(TestIterResourceFiles, self).setUp()
+        self.tmpdir = tempfile.mkdtemp()
+        resdir = os.path.join(self.tmpdir, 'resources')
+        os.makedirs(os.path.join(resdir, 'sub'))
+        for name in ('a.txt', 'b.cfg', os.path.join('sub', 'c.txt')):
+            open(os.path.join(resdir, name), 'w').close()
+        self.module = type(
+            'module', (object, ),
+            {'__file__': os.path.join(self.tmpdir, '__init__.py')}
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def _names(self, **kwargs):
+        return [os.path.relpath(path, self.tmpdir) for path in
+                iter_resource_files([self.module], 'resources', **kwargs)]
+
+    def test_flat(self):
+        assert self._names() == [
+            os.path.join('resources', 'a.txt'),
+            os.path.join('resources', 'b.cfg'),
+            os.path.join('resources', 'sub'),
+        ]
+
+    def test_recursive(self):
+        assert self._names(recursive=True, patterns=['*.txt']) == [
+            os.path.join('resources', 'a.txt'),
+            os.path.join('resources', 'sub', 'c.txt'),
+        ]
+
+    def test_missing(self):
+        assert list(iter_resource_files([self.module], 'missing')) == []
+
+
+class TestResourceIndexRegistry(FlaskTestCase):
+
+    def setUp(self):
+        super(TestResourceIndexRegistry, self).setUp()
+        self.tmpdir = tempfile.mkdtemp()
+        files = {
+            'indexpkga': {'base.html': 'a', 'page.html': 'a {{ x }}'},
+            'indexpkgb': {'page.html': 'b {{ x }}', 'sub/extra.html': 'b'},
+        }
+        for pkg, templates in files.items():
+            os.makedirs(os.path.join(self.tmpdir, pkg, 'templates', 'sub'))
+            open(os.path.join(self.tmpdir, pkg, '__init__.py'), 'w').close()
+            for name, content in templates.items():
+                path = os.path.join(self.tmpdir, pkg, 'templates', name)
+                with open(path, 'w') as f:
+                    f.write(content)
+        sys.path.insert(0, self.tmpdir)
+
+        Registry(app=self.app)
+        self.app.extensions['registry']['pathns'] = ImportPathRegistry(
+            initial=['indexpkga', 'indexpkgb'])
+        self.app.extensions['registry']['tplns'] = ResourceIndexRegistry(
+            'templates', app=self.app, registry_namespace='pathns')
+        self.registry = self.app.extensions['registry']['tplns']
+
+    def tearDown(self):
+        sys.path.remove(self.tmpdir)
+        sys.modules.pop('indexpkga', None)
+        sys.modules.pop('indexpkgb', None)
+        shutil.rmtree(self.tmpdir)
+
+    def _path(self, pkg, name):
+        return os.path.join(self.tmpdir, pkg, 'templates', name)
+
+    def test_lookup(self):
+        assert len(self.registry) == 4
+        assert self.registry.lookup('base.html') == \
+            self._path('indexpkga', 'base.html')
+        assert self.registry.lookup('page.html') == \
+            self._path('indexpkgb', 'page.html')
+        assert self.registry.lookup('sub/extra.html') == \
+            self._path('indexpkgb', os.path.join('sub', 'extra.html'))
+        assert self.registry.lookup('missing.html') is None
+        assert self.registry.get_override_chain('page.html') == [
+            self._path('indexpkgb', 'page.html'),
+            self._path('indexpkga', 'page.html'),
+        ]
+
+    def test_unregister(self):
+        self.registry.unregister(self._path('indexpkgb', 'page.html'))
+        assert self.registry.lookup('page.html') == \
+            self._path('indexpkga', 'page.html')
+        self.registry.unregister(self._path('indexpkga', 'base.html'))
+        assert 'base.html' not in self.registry.index
+
+    def test_read_resource(self):
+        self.registry.max_open_mappings = 2
+        base = self._path('indexpkga', 'base.html')
+        page = self._path('indexpkgb', 'page.html')
+        extra = self._path('indexpkgb', os.path.join('sub', 'extra.html'))
+
+        buf = self.registry.read_resource(page)
+        if six.PY3:
+            assert buf.readonly
+        assert bytes(buf) == b'b {{ x }}'
+        assert self.registry.read_resource(page) is buf
+
+        self.registry.read_resource(base)
+        self.registry.read_resource(extra)
+        assert list(self.registry._mappings) == [base, extra]
+        assert self.registry.read_resource(page) is not buf
+        assert bytes(buf) == b'b {{ x }}'
+
+        self.registry.register(page)
+        self.registry.unregister(page)
+        assert bytes(self.registry.read_resource(page)) == b'b {{ x }}'
+        self.registry.unregister(page)
+        assert page not in self.registry._mappings
+        self.assertRaises(RegistryError, self.registry.read_resource, page)
+
+        self.registry.release_resources()
+        assert not self.registry._mappings
+
+    def test_loader(self):
+        env = Environment(loader=ResourceIndexLoader(self.registry))
+        assert env.get_template('page.html').render(x=1) == 'b 1'
+        assert env.get_template('base.html').render() == 'a'
+        assert env.list_templates() == [
+            'base.html', 'page.html', 'sub/extra.html']
+        self.assertRaises(TemplateNotFound, env.get_template, 'missing.html')
+
+    def test_lazy(self):
+        registry = ResourceIndexRegistry(
+            'templates', app=self.app, registry_namespace='pathns',
+            lazy=True)
+        assert registry._discovery_pending
+        discover_module = registry._discover_module
+        failures = ['indexpkgb']
+
+        def failing_discover_module(pkg):
+            discover_module(pkg)
+            if pkg in failures:
+                failures.remove(pkg)
+                raise ImportError(pkg)
+
+        with patch.object(registry, '_discover_module',
+                          failing_discover_module):
+            self.assertRaises(ImportError, registry.lookup, 'page.html')
+            assert registry.index == {}
+            assert registry._paths == {}
+            env = Environment(loader=ResourceIndexLoader(registry))
+            assert env.list_templates() == [
+                'base.html', 'page.html', 'sub/extra.html']
+        assert registry.lookup('page.html') == \
+            self._path('indexpkgb', 'page.html')
+
+
+class TestStaticResourceRegistry(FlaskTestCase):
+
+    def setUp(self):
+        super(TestStaticResourceRegistry, self).setUp()
+        self.tmpdir = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.tmpdir, 'cache')
+        static_dir = os.path.join(self.tmpdir, 'staticpkg', 'static')
+        os.makedirs(static_dir)
+        open(os.path.join(self.tmpdir, 'staticpkg', '__init__.py'),
+             'w').close()
+        self.big = os.path.join(static_dir, 'big.css')
+        self.small = os.path.join(static_dir, 'small.css')
+        with open(self.big, 'wb') as f:
+            f.write(b'body { color: red; }\n' * 100)
+        with open(self.small, 'wb') as f:
+            f.write(b'a {}')
+        sys.path.insert(0, self.tmpdir)
+
+        Registry(app=self.app)
+        self.app.extensions['registry']['pathns'] = ImportPathRegistry(
+            initial=['staticpkg'])
+
+    def tearDown(self):
+        sys.path.remove(self.tmpdir)
+        sys.modules.pop('staticpkg', None)
+        shutil.rmtree(self.tmpdir)
+
+    def _registry(self, **kwargs):
+        return StaticResourceRegistry('static', app=self.app,
+                                      registry_namespace='pathns',
+                                      cache_dir=self.cache_dir, **kwargs)
+
+    def test_registration(self):
+        registry = self._registry()
+
+        info = registry.get_resource_info('big.css')
+        with open(self.big, 'rb') as f:
+            data = f.read()
+        assert info.path == self.big
+        assert info.size == len(data)
+        assert info.hash == hashlib.sha1(data).hexdigest()
+        with gzip.open(info.compressed_path, 'rb') as f:
+            assert f.read() == data
+
+        info = registry.get_resource_info('small.css')
+        assert info.compressed_path is None
+        assert registry.get_resource_info('missing.css') is None
+
+        registry.unregister(self.small)
+        assert self.small not in registry.resources
+
+    def test_sequential(self):
+        registry = self._registry(workers=1, hash_name='md5')
+        with open(self.small, 'rb') as f:
+            assert registry.get_resource_info('small.css').hash == \
+                hashlib.md5(f.read()).hexdigest()
+
+    def test_manifest_cache(self):
+        registry = self._registry()
+        with open(registry.manifest_path) as f:
+            manifest = json.load(f)
+        manifest['files'][self.small][1] = 'cached'
+        with open(registry.manifest_path, 'w') as f:
+            json.dump(manifest, f)
+
+        registry = self._registry()
+        assert registry.get_resource_info('small.css').hash == 'cached'
+
+        mtime = os.stat(self.small).st_mtime + 10
+        os.utime(self.small, (mtime, mtime))
+        registry = self._registry()
+        assert registry.get_resource_info('small.css').hash != 'cached'
+
+    def test_manifest_settings(self):
+        self._registry()
+        registry = self._registry(hash_name='sha256')
+        with open(self.small, 'rb') as f:
+            assert registry.get_resource_info('small.css').hash == \
+                hashlib.sha256(f.read()).hexdigest()
+
+        registry = self._registry(hash_name='sha256',
+                                  compress_min_size=4096)
+        assert registry.get_resource_info('big.css').compressed_path is None
+
+        css = self._registry(patterns=['*.css'])
+        big = self._registry(patterns=['big.*'])
+        assert len({registry.manifest_path, css.manifest_path,
+                    big.manifest_path}) == 3
+        with open(big.manifest_path) as f:
+            assert list(json.load(f)['files']) == [self.big]
+
 
 class TestEntryPointRegistry(FlaskTestCase):
     def test_regsitration(self):
@@ -116,6 +417,144 @@ class TestEntryPointRegistry(FlaskTestCase):
                          RegistryProxy)
 
 
+class MockDistribution(object):
+    def __init__(self, metadata):
+        self.metadata = metadata
+
+    def has_metadata(self, name):
+        return self.metadata is not None
+
+    def get_metadata(self, name):
+        return self.metadata
+
+
+class TestEntryPointIndex(FlaskTestCase):
+    def test_shared_index(self):
+        reset_entry_point_index()
+        index = get_entry_point_index()
+        assert get_entry_point_index() is index
+
+        with patch.object(EntryPointIndex, 'from_working_set') as build:
+            Registry(app=self.app)
+            self.app.extensions['registry']['ns1'] = \
+                EntryPointRegistry('flask_registry.test_entry')
+            self.app.extensions['registry']['ns2'] = \
+                EntryPointRegistry('console_scripts',
+                                   initial=['easy_install', 'pytest'])
+            assert not build.called
+
+        reset_entry_point_index()
+        assert get_entry_point_index() is not index
+
+    def test_index(self):
+        dist_a = MockDistribution(
+            '[group]\nfirst = mod.a:obj\nsecond = mod.b [extra]\n'
+            '[other]\nthird = mod.c\n')
+        dist_b = MockDistribution('[group]\nfirst = mod.d:obj\n')
+        index = EntryPointIndex.from_working_set(
+            [dist_a, MockDistribution(None), dist_b])
+
+        entry_points = list(index.iter_entry_points('group'))
+        assert [(ep.name, ep.module_name) for ep in entry_points] == [
+            ('first', 'mod.a'), ('second', 'mod.b'), ('first', 'mod.d')]
+        assert entry_points[0].attrs == ('obj', )
+        assert entry_points[0].dist is dist_a
+        assert entry_points[1].extras == ('extra', )
+        assert [ep.module_name for ep in
+                index.iter_entry_points('group', 'first')] == \
+            ['mod.a', 'mod.d']
+        assert list(index.iter_entry_points('group', 'missing')) == []
+        assert list(index.iter_entry_points('missing')) == []
+
+        record = index.names['other']['third'][0]
+        assert not hasattr(record, '__dict__')
+        assert record.entry_point is record.entry_point
+
+
+class TestEntryPointIndexCache(FlaskTestCase):
+    def setUp(self):
+        super(TestEntryPointIndexCache, self).setUp()
+        self.tmpdir = tempfile.mkdtemp()
+        self.cache_file = os.path.join(self.tmpdir, 'entry_points.json')
+        reset_entry_point_index()
+
+    def tearDown(self):
+        reset_entry_point_index()
+        shutil.rmtree(self.tmpdir)
+
+    def test_cache(self):
+        Registry(app=self.app)
+        self.app.extensions['registry']['ns1'] = EntryPointRegistry(
+            'flask_registry.test_entry', load=False,
+            cache_file=self.cache_file)
+        assert os.path.exists(self.cache_file)
+
+        reset_entry_point_index()
+        with patch.object(EntryPointIndex, 'from_working_set') as build:
+            self.app.extensions['registry']['ns2'] = EntryPointRegistry(
+                'flask_registry.test_entry', cache_file=self.cache_file)
+            assert not build.called
+
+        assert self.app.extensions['registry']['ns2']['registry'] == \
+            [Registry]
+        assert self.app.extensions['registry']['ns2']['testcase'] == \
+            [RegistryBase]
+        assert sorted(self.app.extensions['registry']['ns1']) == \
+            sorted(self.app.extensions['registry']['ns2'])
+
+    def test_cache_after_build(self):
+        index = get_entry_point_index()
+        assert not os.path.exists(self.cache_file)
+        assert get_entry_point_index(cache_file=self.cache_file) is index
+        cached = EntryPointIndex.load(self.cache_file,
+                                      distribution_metadata_key())
+        assert sorted(cached.groups) == sorted(index.groups)
+
+        os.remove(self.cache_file)
+        assert get_entry_point_index(cache_file=self.cache_file) is index
+        assert not os.path.exists(self.cache_file)
+
+    def test_cache_order(self):
+        index = EntryPointIndex.from_working_set([
+            MockDistribution('[group]\nfirst = mod.a\nsecond = mod.b\n'),
+            MockDistribution('[group]\nfirst = mod.c\n')])
+        index.save(self.cache_file, 'key')
+        index = EntryPointIndex.load(self.cache_file, 'key')
+        assert [ep.module_name for ep in index.iter_entry_points('group')] \
+            == ['mod.a', 'mod.b', 'mod.c']
+        assert [ep.module_name for ep in
+                index.iter_entry_points('group', 'first')] == \
+            ['mod.a', 'mod.c']
+
+    def test_stale_cache(self):
+        EntryPointIndex({}).save(self.cache_file, 'otherkey')
+        assert EntryPointIndex.load(self.cache_file, 'otherkey').groups == {}
+        with open(self.cache_file, 'w') as f:
+            json.dump({'key': 'otherkey', 'groups': {}}, f)
+        assert EntryPointIndex.load(self.cache_file, 'otherkey') is None
+        assert EntryPointIndex.load(self.cache_file, 'key') is None
+        assert EntryPointIndex.load(
+            os.path.join(self.tmpdir, 'missing.json'), 'key') is None
+
+        index = get_entry_point_index(cache_file=self.cache_file)
+        assert 'flask_registry.test_entry' in index.groups
+        assert EntryPointIndex.load(
+            self.cache_file, distribution_metadata_key()) is not None
+
+    def test_metadata_key(self):
+        dist_info = os.path.join(self.tmpdir, 'foo-1.0.dist-info')
+        os.mkdir(dist_info)
+        key = distribution_metadata_key([self.tmpdir])
+        assert key == distribution_metadata_key([self.tmpdir])
+
+        mtime = os.stat(dist_info).st_mtime + 10
+        os.utime(dist_info, (mtime, mtime))
+        assert key != distribution_metadata_key([self.tmpdir])
+
+        assert distribution_metadata_key([self.cache_file]) != \
+            distribution_metadata_key([self.tmpdir])
+
+
 class TestMockedEntryPoints(FlaskTestCase):
 
     @patch('flask_registry.registries.pkgresources.iter_entry_points',
@@ -149,3 +588,52 @@ class TestMockedEntryPoints(FlaskTestCase):
             EntryPointRegistry,
             'flask_registry.test_entry',
             load=True, exclude=['importfail'], unique=True)
+
+    @patch('flask_registry.registries.pkgresources.iter_entry_points',
+           _slow_entry_points)
+    def test_parallel_load(self):
+        Registry(app=self.app)
+        SlowEntryPoint.threads.clear()
+
+        start = time.time()
+        self.app.extensions['registry']['myns'] = \
+            EntryPointRegistry('flask_registry.test_entry', workers=5)
+        assert time.time() - start < 0.1
+        assert len(SlowEntryPoint.threads) > 1
+
+        self.assertEqual(dict(self.app.extensions['registry']['myns']), {
+            'a': ['0', '2', '4'], 'b': ['1'], 'c': ['3']
+        })
+
+    @patch('flask_registry.registries.pkgresources.iter_entry_points',
+           _slow_entry_points)
+    def test_parallel_load_unique(self):
+        Registry(app=self.app)
+        SlowEntryPoint.threads.clear()
+
+        self.assertRaises(
+            RuntimeError,
+            EntryPointRegistry,
+            'flask_registry.test_entry', workers=5, unique=True)
+        assert not SlowEntryPoint.threads
+
+        self.app.extensions['registry']['myns'] = \
+            EntryPointRegistry('flask_registry.test_entry', workers=5,
+                               unique=True, exclude=['a'])
+        self.assertEqual(dict(self.app.extensions['registry']['myns']), {
+            'b': '1', 'c': '3'
+        })
+
+    @patch('flask_registry.registries.pkgresources.iter_entry_points',
+           _slow_entry_points)
+    def test_secondary_index(self):
+        registry = EntryPointRegistry('flask_registry.test_entry',
+                                      exclude=['a'])
+        registry.add_index('count', len)
+        assert sorted(registry.find('count', 1)) == [['1'], ['3']]
+
+        for entry_point in _slow_entry_points(None, None):
+            if entry_point.name == 'a':
+                registry.register(entry_point)
+        assert registry.find('count', 3) == [['0', '2', '4']]
+        assert sorted(registry.index_keys('count')) == [1, 3]
@@ -0,0 +1,221 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of Flask-Registry
+# Copyright (C) 2016 CERN.
+#
+# Flask-Registry is free software; you can redistribute it and/or
+# modify it under the terms of the Revised BSD License; see LICENSE
+# file for more details.
+
+from __future__ import absolute_import
+
+import os
+import shutil
+import sys
+import tempfile
+import threading
+
+from mock import patch
+from pkg_resources import EntryPoint
+
+from flask_registry import (EntryPointRegistry, ExtensionRegistry,
+                            ImportPathRegistry, ModuleDiscoveryRegistry,
+                            Registry)
+from flask_registry.profiling import (ImportTracer, MemoryProfiler,
+                                      profile_step)
+from helpers import FlaskTestCase
+
+MODULES = {
+    'profpkg/__init__.py': '',
+    'profpkg/views.py': 'import profdep.heavy\n',
+    'profdep/__init__.py': '',
+    'profdep/heavy.py': 'import time\ntime.sleep(0.02)\n',
+    'profext.py': 'import profdep.light\ndef setup_app(app):\n    pass\n',
+    'profdep/light.py': '',
+    'profentry.py': 'import profdep.entry\nobj = object()\n',
+    'profdep/entry.py': '',
+    'profmem/__init__.py': '',
+    'profmem/views.py': 'DATA = [bytearray(1024) for _ in range(1024)]\n',
+}
+
+
+class ResolvingEntryPoint(EntryPoint):
+    def load(self):
+        return self.resolve()
+
+
+def _mock_entry_points(_, name):
+    yield ResolvingEntryPoint('myentry', 'profentry', attrs=('obj', ))
+
+
+class ProfilingTestCase(FlaskTestCase):
+
+    def setUp(self):
+        if sys.version_info < (3, 4):
+            self.skipTest('Profiling requires Python 3.4+.')
+        super(ProfilingTestCase, self).setUp()
+        self.tmpdir = tempfile.mkdtemp()
+        for name, content in MODULES.items():
+            path = os.path.join(self.tmpdir, *name.split('/'))
+            if not os.path.isdir(os.path.dirname(path)):
+                os.makedirs(os.path.dirname(path))
+            with open(path, 'w') as f:
+                f.write(content)
+        sys.path.insert(0, self.tmpdir)
+
+    def tearDown(self):
+        sys.path.remove(self.tmpdir)
+        for name in list(sys.modules):
+            if name.split('.')[0] in ('profpkg', 'profdep', 'profext',
+                                      'profentry', 'profmem'):
+                del sys.modules[name]
+        shutil.rmtree(self.tmpdir)
+
+
+class TestImportTracer(ProfilingTestCase):
+
+    @patch('flask_registry.registries.pkgresources.iter_entry_points',
+           _mock_entry_points)
+    def test_tracing(self):
+        r = Registry(app=self.app)
+        self.app.config['EXTENSIONS'] = ['profext']
+        r['pathns'] = ImportPathRegistry(initial=['profpkg'])
+
+        with ImportTracer() as tracer:
+            r['myns'] = ModuleDiscoveryRegistry('views',
+                                                registry_namespace='pathns')
+            r['myns'].discover(app=self.app)
+            r['extensions'] = ExtensionRegistry(self.app)
+            r['entries'] = EntryPointRegistry('profiling.test')
+
+        records = dict((record.module, record) for record in tracer.records)
+        assert records['profdep.heavy'].package == 'profpkg'
+        assert records['profdep.heavy'].importer == 'profpkg.views'
+        assert records['profdep.heavy'].self_time >= 0.02
+        assert records['profpkg.views'].cumulative_time >= \
+            records['profdep.heavy'].cumulative_time
+        assert records['profpkg.views'].self_time < 0.02
+        assert records['profdep.light'].package == 'profext'
+        assert records['profdep.entry'].package == 'profentry'
+        assert records['profentry'].importer is None
+
+        report = tracer.report(limit=1)
+        assert report['packages'][0][0] == 'profpkg'
+        assert report['dependencies'][0][:1] == ('profdep', )
+        assert report['dependencies'][0][2] == 4
+
+        text = tracer.format_report()
+        assert 'profpkg' in text
+        assert 'profentry' in text
+
+    def test_stop(self):
+        tracer = ImportTracer()
+        tracer.start()
+        import profdep.light
+        tracer.stop()
+        import profdep.heavy
+        assert [record.module for record in tracer.records] == \
+            ['profdep', 'profdep.light']
+        assert tracer.records[0].package is None
+        assert tracer not in sys.meta_path
+
+    def test_nested(self):
+        with ImportTracer() as outer:
+            import profdep.light
+            with ImportTracer() as inner:
+                import profdep.heavy
+        assert [record.module for record in outer.records] == \
+            ['profdep', 'profdep.light', 'profdep.heavy']
+        assert [record.module for record in inner.records] == \
+            ['profdep.heavy']
+        assert not any(isinstance(finder, type(outer._finder))
+                       for finder in sys.meta_path)
+
+    def test_steps(self):
+        with ImportTracer() as tracer:
+            with profile_step('outer'):
+                with profile_step('inner'):
+                    assert tracer.current_package == 'inner'
+                assert tracer.current_package == 'outer'
+        assert tracer.current_package is None
+
+        with profile_step('nothing'):
+            pass
+
+
+class TestMemoryProfiler(ProfilingTestCase):
+
+    def test_profiling(self):
+        r = Registry(app=self.app)
+        r['pathns'] = ImportPathRegistry(initial=['profmem', 'profpkg'])
+
+        with MemoryProfiler(top=1) as profiler:
+            r['myns'] = ModuleDiscoveryRegistry('views',
+                                                registry_namespace='pathns')
+            r['myns'].discover(app=self.app)
+            with profile_step('outer'):
+                with profile_step('profmem'):
+                    pass
+
+        report = profiler.report()
+        assert report[0][0] == 'profmem'
+        assert report[0][1] >= 1024 * 1024
+        assert dict((p, s) for p, s, _ in report)['outer'] < 1024
+
+        record = [record for record in profiler.records
+                  if record.package == 'profmem'][0]
+        assert len(record.top) == 1
+        assert 'views.py' in record.top[0][0]
+
+        assert 'profmem' in profiler.format_report(limit=1)
+        profiler.register_report(r)
+        assert r['profiling.memory']['profmem'] == report[0][1]
+
+    def test_threads(self):
+        entered = threading.Event()
+        release = threading.Event()
+        data = {}
+
+        def first():
+            with profile_step('first'):
+                entered.set()
+                release.wait(5)
+                data['first'] = bytearray(1024 * 1024)
+
+        def second():
+            entered.wait(5)
+            with profile_step('second'):
+                data['second'] = bytearray(1024 * 1024)
+
+        with MemoryProfiler() as profiler:
+            threads = [threading.Thread(target=target)
+                       for target in (first, second)]
+            for thread in threads:
+                thread.start()
+            threads[1].join(0.1)
+            try:
+                # The second step waits for the first one.
+                assert threads[1].is_alive()
+            finally:
+                release.set()
+                for thread in threads:
+                    thread.join()
+
+        sizes = dict((record.package, record.size)
+                     for record in profiler.records)
+        for package in ('first', 'second'):
+            assert 1024 * 1024 <= sizes[package] < 2 * 1024 * 1024
+
+    def test_tracemalloc_state(self):
+        import tracemalloc
+        with MemoryProfiler():
+            assert tracemalloc.is_tracing()
+        assert not tracemalloc.is_tracing()
+
+        tracemalloc.start()
+        try:
+            with MemoryProfiler():
+                pass
+            assert tracemalloc.is_tracing()
+        finally:
+            tracemalloc.stop()
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of Flask-Registry
+# Copyright (C) 2016 CERN.
+#
+# Flask-Registry is free software; you can redistribute it and/or
+# modify it under the terms of the Revised BSD License; see LICENSE
+# file for more details.
+
+from __future__ import absolute_import, unicode_literals
+
+import os
+import shutil
+import tempfile
+
+from flask_registry import (DictRegistry, ImportPathRegistry, ListRegistry,
+                            Registry, SingletonRegistry)
+from flask_registry.snapshot import (Snapshot, SnapshotDictRegistry,
+                                     SnapshotListRegistry, load_snapshot,
+                                     write_snapshot)
+from helpers import FlaskTestCase
+
+
+class TestSnapshot(FlaskTestCase):
+
+    def setUp(self):
+        super(TestSnapshot, self).setUp()
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'registry.snapshot')
+
+        self.r = Registry(app=self.app)
+        self.r['packages'] = ImportPathRegistry(
+            initial=['flask_registry.registries.*'])
+        self.r['list'] = ListRegistry()
+        self.r['list'].register_many([1, 'two', None, [3.5, {'a': True}]])
+        self.r['config'] = DictRegistry()
+        self.r['config'].register_many([
+            ('DEBUG', False), ('NAME', 'myapp'), ('ÜMLAUT', {'x': [1]}),
+            ('EMPTY', ''),
+        ])
+        self.r['empty'] = DictRegistry()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_roundtrip(self):
+        write_snapshot(self.path, self.r)
+        snapshot = Snapshot(self.path)
+        assert list(snapshot.namespaces) == list(self.r)
+
+        for namespace in self.r:
+            registry = snapshot.registry(namespace)
+            if isinstance(self.r[namespace], DictRegistry):
+                assert isinstance(registry, SnapshotDictRegistry)
+                assert dict(registry) == dict(self.r[namespace])
+                assert list(registry) == sorted(self.r[namespace])
+            else:
+                assert isinstance(registry, SnapshotListRegistry)
+                assert list(registry) == list(self.r[namespace])
+        snapshot.close()
+
+    def test_access(self):
+        write_snapshot(self.path, self.r, namespaces=['list', 'config'])
+        snapshot = Snapshot(self.path)
+        assert list(snapshot.namespaces) == ['list', 'config']
+
+        items = snapshot.registry('list')
+        assert len(items) == 4
+        assert items[1] == 'two'
+        assert items[-1] == [3.5, {'a': True}]
+        assert items[1:3] == ['two', None]
+        assert 'two' in items
+        self.assertRaises(IndexError, items.__getitem__, 4)
+
+        config = snapshot.registry('config')
+        assert len(config) == 4
+        assert config['NAME'] == 'myapp'
+        assert config['ÜMLAUT'] == {'x': [1]}
+        assert config.get('EMPTY') == ''
+        assert 'DEBUG' in config
+        assert 'MISSING' not in config
+        assert 1 not in config
+        self.assertRaises(KeyError, config.__getitem__, 'ZZZ')
+        self.assertRaises(KeyError, config.__getitem__, 'A')
+
+        self.assertRaises(NotImplementedError, config.register, 'KEY', 1)
+        self.assertRaises(NotImplementedError, items.unregister, 'two')
+        self.assertRaises(NotImplementedError, items.register_many, [1])
+        snapshot.close()
+
+    def test_install(self):
+        write_snapshot(self.path, self.r)
+        worker = Registry()
+        worker['config'] = DictRegistry()
+        snapshot = load_snapshot(self.path, registry=worker)
+        assert sorted(worker) == sorted(self.r)
+        assert worker['config'].namespace == 'config'
+        assert worker['config']['DEBUG'] is False
+        assert list(worker['packages']) == list(self.r['packages'])
+
+        # Writing a new snapshot does not change the mapped one.
+        self.r['list'].register('new')
+        write_snapshot(self.path, self.r)
+        assert len(worker['list']) == 4
+        assert len(load_snapshot(self.path).registry('list')) == 5
+        snapshot.close()
+
+    def test_errors(self):
+        self.r['singleton'] = SingletonRegistry()
+        self.assertRaises(TypeError, write_snapshot, self.path, self.r)
+        self.r['dict'] = DictRegistry()
+        self.r['dict'].register(1, 'one')
+        self.assertRaises(TypeError, write_snapshot, self.path, self.r,
+                          namespaces=['dict'])
+        self.r['list'].register(object())
+        self.assertRaises(TypeError, write_snapshot, self.path, self.r,
+                          namespaces=['list'])
+        assert not os.path.exists(self.path)
+
+        with open(self.path, 'wb') as f:
+            f.write(b'not a snapshot')
+        self.assertRaises(ValueError, Snapshot, self.path)